@@ -0,0 +1,99 @@
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from summarizer import summarize
+
+
+class AsyncSummarizer(object):
+    """
+    asyncio entry point for summarize().
+
+    The whole pipeline (cleaning, similarity and PageRank) runs on an executor,
+    a process pool by default so the event loop does not compete with it for
+    the GIL. At most max_concurrency summaries are in the executor at any time;
+    the other callers wait without blocking the loop.
+
+    The timeout covers the wait for a slot as well as the summary itself. A call
+    that is cancelled or times out is withdrawn from the executor if it has not
+    started yet. A summary that is already running cannot be interrupted: its
+    result is discarded and its concurrency slot is only freed when it actually
+    finishes, so the executor is never oversubscribed.
+
+    Instances belong to the event loop they are first used in.
+    """
+
+    def __init__(self, executor=None, max_concurrency=4, timeout=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._semaphore = None
+
+    async def summarize(self, text, timeout=None, **kwargs):
+        """ Summarizes the text without blocking the event loop. timeout, in
+        seconds, overrides the one given to the constructor. The remaining
+        keyword arguments are passed to summarize(). """
+        if timeout is None:
+            timeout = self.timeout
+
+        return await asyncio.wait_for(self._run(text, kwargs), timeout)
+
+    async def _run(self, text, kwargs):
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        try:
+            job = self._get_executor().submit(summarize, text, **kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+        job.add_done_callback(lambda _: _call_soon(loop, semaphore.release))
+
+        try:
+            return await asyncio.wrap_future(job)
+        except asyncio.CancelledError:
+            # Frees the slot through the callback if the job has not started.
+            job.cancel()
+            raise
+
+    def close(self, wait=True):
+        """ Shuts down the executor if it was created by this instance. """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_concurrency)
+        return self._executor
+
+
+def _call_soon(loop, callback):
+    # Executor callbacks run in other threads and may outlive the loop.
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass
+
+
+async def summarize_async(text, executor=None, timeout=None, **kwargs):
+    """ Runs summarize() on the given executor (the loop's default one if None)
+    and waits for it for at most timeout seconds. Process pools are supported. """
+    loop = asyncio.get_running_loop()
+    # A partial of a module function can be pickled, unlike a local lambda.
+    job = loop.run_in_executor(executor, functools.partial(summarize, text, **kwargs))
+    return await asyncio.wait_for(job, timeout)
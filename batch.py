@@ -0,0 +1,101 @@
+import os
+from collections import namedtuple
+from concurrent.futures import as_completed
+from commons import managed_executor as _managed_executor
+from summarizer import summarize
+
+# Texts are packed into chunks of about this many characters. Larger documents
+# are always sent on their own.
+DEFAULT_CHUNK_SIZE = 100000
+
+# Smaller batches are split into at least this many chunks per worker, so
+# every worker gets a share and the longest chunk does not set the pace.
+CHUNKS_PER_WORKER = 4
+
+# One result per input document. error holds the exception raised while
+# summarizing it, in which case summary is None.
+BatchResult = namedtuple("BatchResult", ["index", "summary", "error"])
+
+
+def _size(text):
+    try:
+        return len(getattr(text, "text", text))
+    except TypeError:
+        return 0
+
+
+def _worker_count(pool):
+    # Both standard executors record it; ProcessPoolExecutor defaults to it.
+    return getattr(pool, "_max_workers", None) or os.cpu_count() or 1
+
+
+def _make_chunks(texts, chunk_size, workers=1):
+    items = list(enumerate(texts))
+    total_size = sum(_size(text) for _, text in items)
+    chunk_size = max(1, min(chunk_size, total_size // (workers * CHUNKS_PER_WORKER)))
+
+    # Longest documents first, so a huge document starts as soon as possible
+    # instead of stalling the tail of the batch, and small documents are packed
+    # together to amortize the cost of dispatching them.
+    items.sort(key=lambda item: _size(item[1]), reverse=True)
+
+    chunks = []
+    current, current_size = [], 0
+    for index, text in items:
+        size = _size(text)
+        if current and current_size + size > chunk_size:
+            chunks.append(current)
+            current, current_size = [], 0
+        current.append((index, text))
+        current_size += size
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _summarize_chunk(chunk, kwargs):
+    results = []
+    for index, text in chunk:
+        try:
+            results.append(BatchResult(index, summarize(text, **kwargs), None))
+        except Exception as error:
+            results.append(BatchResult(index, None, error))
+    return results
+
+
+def summarize_many(texts, executor="process", max_workers=None, ordered=True, chunk_size=DEFAULT_CHUNK_SIZE,
+                   **kwargs):
+    """ Summarizes many texts in parallel and yields a BatchResult for each one.
+
+    executor is "process", "thread" or an existing concurrent.futures.Executor,
+    which is left running. Results are yielded in input order if ordered is
+    true, otherwise as soon as they are ready. A document that fails does not
+    stop the batch: its result carries the exception instead. The remaining
+    keyword arguments are passed to summarize().
+
+    Small documents are sent to the workers in chunks of up to chunk_size
+    characters, smaller when needed to give every worker several chunks. """
+    with _managed_executor(executor, max_workers, cancel_futures=True) as pool:
+        chunks = _make_chunks(texts, chunk_size, _worker_count(pool))
+        futures = {pool.submit(_summarize_chunk, chunk, kwargs): chunk for chunk in chunks}
+
+        pending = {}
+        next_index = 0
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as error:
+                # The worker itself failed (e.g. a process was killed).
+                results = [BatchResult(index, None, error) for index, _ in futures[future]]
+
+            if not ordered:
+                for result in results:
+                    yield result
+                continue
+
+            for result in results:
+                pending[result.index] = result
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
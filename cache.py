@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def cache_key(digest, ratio, words, language, additional_stopwords, options=None):
+    """ Returns the content address of a summary request: a SHA-256 of the
+    text digest (see text_digest) and every parameter that changes which
+    sentences are extracted. Output formatting options are deliberately left
+    out. """
+    stopwords = sorted(additional_stopwords) if additional_stopwords else []
+    parameters = [ratio, words, language, stopwords, sorted((options or {}).items())]
+
+    key = hashlib.sha256()
+    key.update(digest.encode("ascii"))
+    key.update(repr(parameters).encode("utf-8"))
+    return key.hexdigest()
+
+
+def mapping_fingerprint(mapping):
+    """ Stable identifier of a term -> weight mapping used as cache option. """
+    fingerprint = getattr(mapping, "fingerprint", None)
+    if fingerprint is not None:
+        return fingerprint
+    return hashlib.sha256(repr(sorted(mapping.items())).encode("utf-8")).hexdigest()
+
+
+class SummaryCache(object):
+    """
+    Content-addressed cache of summarize() rankings.
+
+    Entries are the extracted sentences as (text, score, index) tuples, so every
+    output format (plain text, split, scores) is produced from the same entry.
+    At most max_entries are kept in memory, evicting the least recently used
+    ones. If a directory is given, entries are also written there, one JSON file
+    per key, and survive restarts.
+    """
+
+    def __init__(self, max_entries=1024, directory=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be a positive integer")
+        self.max_entries = max_entries
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """ Returns the ranking stored under key, or None. """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        ranking = self._read(key)
+        with self._lock:
+            if ranking is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, ranking)
+        return ranking
+
+    def put(self, key, ranking):
+        ranking = [tuple(entry) for entry in ranking]
+        with self._lock:
+            self._store(key, ranking)
+        self._write(key, ranking)
+
+    def clear(self):
+        """ Empties the memory tier; files on disk are kept. """
+        with self._lock:
+            self._entries.clear()
+
+    def statistics(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0,
+            }
+
+    def _store(self, key, ranking):
+        self._entries[key] = ranking
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as file:
+                return [tuple(entry) for entry in json.load(file)]
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key, ranking):
+        if self.directory is None:
+            return
+        # Written to a temporary file first so readers never see partial entries.
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(ranking, file)
+            os.replace(temporary, self._path(key))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from graph import Graph
 
 
@@ -10,6 +12,52 @@ def build_graph(sequence):
 
 
 def remove_unreachable_nodes(graph):
-    for node in graph.nodes():
-        if sum(graph.edge_weight((node, other)) for other in graph.neighbors(node)) == 0:
-            graph.del_node(node)
+    graph.remove_nodes_from([node for node in graph.nodes()
+                             if sum(graph.edge_weight((node, other)) for other in graph.neighbors(node)) == 0])
+
+
+def connected_components(graph):
+    """ Returns the connected components of the graph as lists of nodes, in
+    linear time. Nodes keep the order of graph.nodes() within a component. """
+    nodes = graph.nodes()
+    position = {node: i for i, node in enumerate(nodes)}
+    seen = set()
+    components = []
+    for node in nodes:
+        if node in seen:
+            continue
+        seen.add(node)
+        component = [node]
+        # Breadth-first search; the list grows while it is being visited.
+        for current in component:
+            for other in graph.neighbors(current):
+                if other not in seen:
+                    seen.add(other)
+                    component.append(other)
+        component.sort(key=position.__getitem__)
+        components.append(component)
+    return components
+
+
+def create_executor(executor, max_workers=None):
+    if executor == "process":
+        return ProcessPoolExecutor(max_workers)
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers)
+    raise ValueError("executor must be 'process', 'thread' or a concurrent.futures.Executor")
+
+
+@contextmanager
+def managed_executor(executor, max_workers=None, cancel_futures=False):
+    """ Yields the executor to run jobs on. None and concurrent.futures
+    Executors are yielded as they are and left to the caller; "process" and
+    "thread" get a new pool (see create_executor) that is shut down on exit. """
+    if executor is None or isinstance(executor, Executor):
+        yield executor
+        return
+
+    pool = create_executor(executor, max_workers)
+    try:
+        yield pool
+    finally:
+        pool.shutdown(cancel_futures=cancel_futures)
@@ -0,0 +1,133 @@
+from array import array
+from operator import mul
+
+# Array typecodes of the supported value storages.
+STORAGE_TYPECODES = {"float64": "d", "float32": "f", "uint16": "H"}
+UINT16_MAX = 65535
+
+
+class CSRMatrix(object):
+    """
+    Square sparse matrix in compressed sparse row format.
+
+    Row i holds the columns indices[indptr[i]:indptr[i + 1]] with the values
+    data[indptr[i]:indptr[i + 1]]; the three are flat arrays, so a matrix
+    costs a few bytes per non zero entry instead of a Python object each.
+
+    The stored values are multiplied by scale, which lets quantized integer
+    data stand for real values, and, if column_scale is given, every column j
+    is multiplied by column_scale[j] as well.
+    """
+
+    def __init__(self, indptr, indices, data, scale=1.0, column_scale=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.scale = scale
+        self.column_scale = column_scale
+
+    @classmethod
+    def from_rows(cls, rows, typecode="d"):
+        """ Builds a matrix from an iterable of rows, each one an iterable of
+        (column, value) pairs. """
+        indptr = array("q", [0])
+        indices = array("q")
+        data = array(typecode)
+        for row in rows:
+            for column, value in row:
+                indices.append(column)
+                data.append(value)
+            indptr.append(len(indices))
+        return cls(indptr, indices, data)
+
+    @classmethod
+    def from_symmetric_pairs(cls, size, pairs, storage="float64"):
+        """ Builds the symmetric weight matrix of an undirected graph with size
+        nodes from (i, j, weight) tuples, each edge given once with i != j.
+
+        storage selects how the weights are kept:
+            float64  8 bytes per value, exact.
+            float32  4 bytes per value; about 7 significant digits are kept.
+            uint16   2 bytes per value; weights are rounded to multiples of
+                     max_weight / 65535 and the ones below half of that step
+                     are dropped.
+        Column indices take 4 bytes, so an edge (stored in both directions)
+        costs 24, 16 or 12 bytes. """
+        if storage not in STORAGE_TYPECODES:
+            raise ValueError("Valid storages are: " + ", ".join(sorted(STORAGE_TYPECODES)))
+
+        rows, columns = array("i"), array("i")
+        weights = array("d" if storage == "float64" else "f")
+        for i, j, weight in pairs:
+            rows.append(i)
+            columns.append(j)
+            weights.append(weight)
+
+        scale = 1.0
+        if storage == "uint16":
+            largest = max(weights, default=0)
+            scale = largest / UINT16_MAX if largest > 0 else 1.0
+            weights = array("H", (int(round(weight / scale)) for weight in weights))
+
+        degrees = array("q", [0]) * size
+        for i, j, weight in zip(rows, columns, weights):
+            if weight:
+                degrees[i] += 1
+                degrees[j] += 1
+
+        indptr = array("q", [0])
+        for degree in degrees:
+            indptr.append(indptr[-1] + degree)
+
+        indices = array("i", [0]) * indptr[-1]
+        data = array(STORAGE_TYPECODES[storage], [0]) * indptr[-1]
+        fill = array("q", indptr[:-1])
+        for i, j, weight in zip(rows, columns, weights):
+            if not weight:
+                continue
+            indices[fill[i]], data[fill[i]] = j, weight
+            fill[i] += 1
+            indices[fill[j]], data[fill[j]] = i, weight
+            fill[j] += 1
+
+        return cls(indptr, indices, data, scale)
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def row(self, i):
+        """ Returns the (columns, stored values) of row i. """
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def row_sums(self):
+        """ Returns the sum of every row, ignoring column_scale. """
+        indptr, data = self.indptr, self.data
+        return [self.scale * sum(data[indptr[i]:indptr[i + 1]]) for i in range(len(indptr) - 1)]
+
+    def dot_row(self, i, vector):
+        """ Returns the product of row i and a vector. """
+        return self.scale * self._dot_row(i, self._scale_columns(vector))
+
+    def matvec(self, vector):
+        """ Returns the product of the matrix and a vector, as a list. """
+        indptr, indices, data, scale = self.indptr, self.indices, self.data, self.scale
+        get = self._scale_columns(vector).__getitem__
+        result = []
+        for i in range(len(indptr) - 1):
+            start, end = indptr[i], indptr[i + 1]
+            result.append(scale * sum(map(mul, data[start:end], map(get, indices[start:end]))))
+        return result
+
+    def _dot_row(self, i, vector):
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return sum(map(mul, self.data[start:end], map(vector.__getitem__, self.indices[start:end])))
+
+    def _scale_columns(self, vector):
+        if self.column_scale is None:
+            return vector
+        return [value * scale for value, scale in zip(vector, self.column_scale)]
@@ -0,0 +1,119 @@
+import hashlib
+import os
+from math import log10
+from stopwords import get_stopwords_by_language
+from cache import text_digest as _text_digest
+from textcleaner import clean_text_by_sentences as _clean_text_by_sentences
+from textcleaner import clean_text_by_word as _clean_text_by_words
+from textcleaner import clean_sentences_from_source as _clean_sentences_from_source
+
+
+class AnalyzedDocument(object):
+    """
+    Result of processing a text once, shared by summarize, get_graph,
+    get_words and inverse_sentence_frequency so the text is only tokenized
+    a single time per request.
+
+    Holds the processed sentences (SyntacticUnit list), their filtered tokens,
+    the vocabulary of the document, a posting index of term -> sentence ids
+    and its inverse sentence frequency table. The last two are computed the
+    first time they are needed.
+    """
+
+    def __init__(self, text, language="english", additional_stopwords=None):
+        if not isinstance(text, str):
+            raise ValueError("Text parameter must be a Unicode object (str)!")
+
+        self._initialize(text, language, additional_stopwords,
+                         _clean_text_by_sentences(text, language, additional_stopwords))
+
+    @classmethod
+    def from_source(cls, source, language="english", additional_stopwords=None, encoding="utf-8", errors="strict"):
+        """ Analyzes a file path or a binary buffer without loading it as a
+        whole. The resulting document has no text; it is identified by the
+        SHA-256 digest of the raw bytes instead, which is only computed (reading
+        the source again) if digest is used, e.g. for a cache key. """
+        document = cls.__new__(cls)
+        sentences = _clean_sentences_from_source(source, language, additional_stopwords, encoding, errors)
+        document._initialize(None, language, additional_stopwords, sentences)
+        document._source = source
+        return document
+
+    def _initialize(self, text, language, additional_stopwords, sentences):
+        self.text = text
+        self.language = language
+        self.additional_stopwords = additional_stopwords
+
+        self.sentences = sentences
+        self.tokens = [sentence.token for sentence in self.sentences]
+
+        self._source = None
+        self._digest = None
+        self._filtered_words = None
+        self._vocabulary = None
+        self._postings = None
+        self._isf = None
+
+    @property
+    def digest(self):
+        """ SHA-256 hex digest of the UTF-8 text (or of the raw source bytes). """
+        if self._digest is None:
+            self._digest = _text_digest(self.text) if self._source is None else _source_digest(self._source)
+        return self._digest
+
+    @property
+    def words(self):
+        """ Filtered words of the document, in order of appearance. """
+        return [word for token in self.tokens for word in token.split()]
+
+    @property
+    def filtered_words(self):
+        """ Every word of the text as returned by clean_text_by_word: aligned with
+        the original words, with '' for the removed ones. Computed the first time
+        it is needed; documents without text (from_source) do not have it. """
+        if self._filtered_words is None:
+            if self.text is None:
+                raise ValueError("filtered_words needs the text of the document")
+            self._filtered_words = _clean_text_by_words(self.text, self.language,
+                                                        additional_stopwords=self.additional_stopwords)
+        return self._filtered_words
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            stopwords = get_stopwords_by_language(self.language)
+            self._vocabulary = set(self.words) - set(word for word in stopwords.split() if word)
+        return self._vocabulary
+
+    @property
+    def postings(self):
+        """ Inverted index of the document: term -> ids of the sentences
+        (positions in self.sentences) that contain it, in increasing order. """
+        if self._postings is None:
+            postings = {}
+            for sentence_id, token in enumerate(self.tokens):
+                for word in set(token.split()):
+                    postings.setdefault(word, []).append(sentence_id)
+            self._postings = postings
+        return self._postings
+
+    @property
+    def isf(self):
+        if self._isf is None:
+            self._isf = self._inverse_sentence_frequency()
+        return self._isf
+
+    def _inverse_sentence_frequency(self):
+        # The sentence frequency of every word is the length of its posting list,
+        # so words are matched exactly instead of as substrings of the sentences.
+        sentence_count = len(self.sentences)
+        postings = self.postings
+        return {word: log10(sentence_count / len(postings[word])) for word in self.vocabulary}
+
+
+def _source_digest(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+    with memoryview(source) as buffer:
+        return hashlib.sha256(buffer.cast("B")).hexdigest()
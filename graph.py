@@ -1,4 +1,7 @@
 from abc import ABCMeta, abstractmethod
+from collections.abc import Mapping
+from array import array
+from bisect import bisect_left
 
 
 class IGraph(metaclass=ABCMeta):
@@ -132,10 +135,49 @@ class IGraph(metaclass=ABCMeta):
         """
         pass
 
+    def remove_nodes_from(self, nodes):
+        """
+        Remove many nodes from the graph.
+
+        @type  nodes: iterable
+        @param nodes: Node identifiers.
+        """
+        for node in nodes:
+            self.del_node(node)
+
+
+class _EdgeProperties(Mapping):
+    """
+    Read only mapping of every directed edge (u, v) to its properties dict,
+    as the mirrored edge_properties dict of older versions exposed them.
+    """
+
+    def __init__(self, node_neighbors):
+        self._node_neighbors = node_neighbors
+
+    def __getitem__(self, edge):
+        u, v = edge
+        try:
+            return self._node_neighbors[u][v]
+        except KeyError:
+            raise KeyError(edge)
+
+    def __iter__(self):
+        for u, neighbors in self._node_neighbors.items():
+            for v in neighbors:
+                yield (u, v)
+
+    def __len__(self):
+        return sum(len(neighbors) for neighbors in self._node_neighbors.values())
+
 
 class Graph(IGraph):
     """
     Implementation of an undirected graph, based on Pygraph
+
+    Every node maps to a dict of its neighbors, and both directions of an
+    edge share the same properties dict, so adding, finding and removing an
+    edge take constant time.
     """
 
     WEIGHT_ATTRIBUTE_NAME = "weight"
@@ -146,43 +188,60 @@ class Graph(IGraph):
 
     def __init__(self):
         # Metadata about edges
-        self.edge_properties = {}    # Mapping: Edge -> Dict mapping, lablel-> str, wt->num
         self.edge_attr = {}          # Key value pairs: (Edge -> Attributes)
         # Metadata about nodes
         self.node_attr = {}          # Pairing: Node -> Attributes
-        self.node_neighbors = {}     # Pairing: Node -> Neighbors
+        self.node_neighbors = {}     # Pairing: Node -> (Neighbor -> Edge properties)
         self.isf={}
 
+    @property
+    def edge_properties(self):
+        return _EdgeProperties(self.node_neighbors)
+
     def has_edge(self, edge):
         u,v = edge
-        return (u,v) in self.edge_properties and (v,u) in self.edge_properties
+        return u in self.node_neighbors and v in self.node_neighbors[u]
 
     def edge_weight(self, edge):
-        return self.get_edge_properties( edge ).setdefault( self.WEIGHT_ATTRIBUTE_NAME, self.DEFAULT_WEIGHT )
+        return self.get_edge_properties( edge ).get( self.WEIGHT_ATTRIBUTE_NAME, self.DEFAULT_WEIGHT )
 
     def neighbors(self, node):
-        return self.node_neighbors[node]
+        return list(self.node_neighbors[node])
 
     def has_node(self, node):
         return node in self.node_neighbors
 
     def add_edge(self, edge, wt=1, label='', attrs=[]):
         u, v = edge
-        if (v not in self.node_neighbors[u] and u not in self.node_neighbors[v]):
-            self.node_neighbors[u].append(v)
-            if (u != v):
-                self.node_neighbors[v].append(u)
+        if (v not in self.node_neighbors[u]):
+            properties = {self.LABEL_ATTRIBUTE_NAME: label, self.WEIGHT_ATTRIBUTE_NAME: wt}
+            self.node_neighbors[u][v] = properties
+            self.node_neighbors[v][u] = properties
 
             self.add_edge_attributes((u,v), attrs)
-            self.set_edge_properties((u, v), label=label, weight=wt)
         else:
             raise ValueError("Edge (%s, %s) already in graph" % (u, v))
 
+    def add_edges_from(self, edges):
+        """
+        Add many weighted edges at once.
+
+        @type  edges: iterable
+        @param edges: Iterable of (u, v, weight) tuples.
+        """
+        node_neighbors = self.node_neighbors
+        for u, v, wt in edges:
+            if v in node_neighbors[u]:
+                raise ValueError("Edge (%s, %s) already in graph" % (u, v))
+            properties = {self.LABEL_ATTRIBUTE_NAME: self.DEFAULT_LABEL, self.WEIGHT_ATTRIBUTE_NAME: wt}
+            node_neighbors[u][v] = properties
+            node_neighbors[v][u] = properties
+
     def add_node(self, node, attrs=None):
         if attrs is None:
             attrs = []
         if (not node in self.node_neighbors):
-            self.node_neighbors[node] = []
+            self.node_neighbors[node] = {}
             self.node_attr[node] = attrs
         else:
             raise ValueError("Node %s already in graph" % node)
@@ -191,18 +250,21 @@ class Graph(IGraph):
         return list(self.node_neighbors.keys())
 
     def edges(self):
-        return [ a for a in list(self.edge_properties.keys()) ]
+        return list(self.edge_properties)
 
     def del_node(self, node):
-        for each in list(self.neighbors(node)):
-            if (each != node):
-                self.del_edge((each, node))
+        for each in list(self.node_neighbors[node]):
+            self.del_edge((each, node))
         del(self.node_neighbors[node])
         del(self.node_attr[node])
 
     # Helper methods
     def get_edge_properties(self, edge):
-        return self.edge_properties.setdefault( edge, {} )
+        u, v = edge
+        try:
+            return self.node_neighbors[u][v]
+        except KeyError:
+            return {}
 
     def add_edge_attributes(self, edge, attrs):
         for attr in attrs:
@@ -221,25 +283,165 @@ class Graph(IGraph):
             return []
 
     def set_edge_properties(self, edge, **properties ):
-        self.edge_properties.setdefault( edge, {} ).update( properties )
-        if (edge[0] != edge[1]):
-            self.edge_properties.setdefault((edge[1], edge[0]), {}).update( properties )
+        u, v = edge
+        self.node_neighbors[u][v].update( properties )
 
     def del_edge(self, edge):
         u, v = edge
-        self.node_neighbors[u].remove(v)
-        self.del_edge_labeling((u, v))
+        del(self.node_neighbors[u][v])
         if (u != v):
-            self.node_neighbors[v].remove(u)
-            self.del_edge_labeling((v, u)) # TODO: This is redundant
-
-    def del_edge_labeling( self, edge ):
-        keys = [edge]
-        keys.append(edge[::-1])
-
-        for key in keys:
-            for mapping in [self.edge_properties, self.edge_attr ]:
-                try:
-                    del ( mapping[key] )
-                except KeyError:
-                    pass
\ No newline at end of file
+            del(self.node_neighbors[v][u])
+        if self.edge_attr:
+            self.edge_attr.pop((u, v), None)
+            self.edge_attr.pop((v, u), None)
+
+
+class CSRGraph(IGraph):
+    """
+    Immutable undirected graph stored in compressed sparse row arrays.
+
+    Nodes are mapped to the integer ids 0..n-1; the neighbors of node i are
+    targets[offsets[i]:offsets[i + 1]], sorted, with the edge weights at the
+    same positions. Every edge is stored once per direction and costs 16
+    bytes instead of the tuples and dicts of Graph.
+
+    Edges cannot be added. del_node only hides a node and its edges, so the
+    arrays are never rebuilt.
+    """
+
+    def __init__(self, nodes, offsets, targets, weights):
+        self._nodes = list(nodes)
+        self._ids = {node: i for i, node in enumerate(self._nodes)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self._deleted = bytearray(len(self._nodes))
+
+    @classmethod
+    def from_edge_arrays(cls, nodes, sources, targets, weights):
+        """
+        Build a graph from parallel edge arrays.
+
+        Every undirected edge is given once, as the node ids sources[k] and
+        targets[k] with the weight weights[k]. Self loops and duplicated
+        edges are not allowed.
+
+        @type  nodes: list
+        @param nodes: Node identifiers; the id of a node is its position.
+
+        @type  sources: sequence
+        @param sources: Node id of one end of every edge.
+
+        @type  targets: sequence
+        @param targets: Node id of the other end of every edge.
+
+        @type  weights: sequence
+        @param weights: Weight of every edge.
+
+        @rtype:  CSRGraph
+        @return: The graph.
+        """
+        size = len(nodes)
+        degrees = array("q", [0]) * size
+        for u, v in zip(sources, targets):
+            if u == v:
+                raise ValueError("Edge (%s, %s) is a self loop" % (nodes[u], nodes[v]))
+            degrees[u] += 1
+            degrees[v] += 1
+
+        offsets = array("q", [0])
+        for degree in degrees:
+            offsets.append(offsets[-1] + degree)
+
+        adjacency = array("q", [0]) * offsets[-1]
+        edge_weights = array("d", [0.0]) * offsets[-1]
+        fill = array("q", offsets[:-1])
+        for u, v, wt in zip(sources, targets, weights):
+            adjacency[fill[u]], edge_weights[fill[u]] = v, wt
+            fill[u] += 1
+            adjacency[fill[v]], edge_weights[fill[v]] = u, wt
+            fill[v] += 1
+
+        # Sorts every row so edges can be looked up with a binary search.
+        for i in range(size):
+            start, end = offsets[i], offsets[i + 1]
+            row = sorted(zip(adjacency[start:end], edge_weights[start:end]))
+            for position, (v, wt) in enumerate(row, start):
+                if position > start and v == adjacency[position - 1]:
+                    raise ValueError("Edge (%s, %s) already in graph" % (nodes[i], nodes[v]))
+                adjacency[position], edge_weights[position] = v, wt
+
+        return cls(nodes, offsets, adjacency, edge_weights)
+
+    @classmethod
+    def from_edges(cls, nodes, edges):
+        """
+        Build a graph from an iterable of (u, v, weight) tuples of node ids.
+
+        @type  nodes: list
+        @param nodes: Node identifiers; the id of a node is its position.
+
+        @type  edges: iterable
+        @param edges: Every undirected edge, once.
+
+        @rtype:  CSRGraph
+        @return: The graph.
+        """
+        sources, targets, weights = array("q"), array("q"), array("d")
+        for u, v, wt in edges:
+            sources.append(u)
+            targets.append(v)
+            weights.append(wt)
+        return cls.from_edge_arrays(nodes, sources, targets, weights)
+
+    def nodes(self):
+        deleted = self._deleted
+        return [node for i, node in enumerate(self._nodes) if not deleted[i]]
+
+    def edges(self):
+        nodes, deleted, offsets, targets = self._nodes, self._deleted, self.offsets, self.targets
+        return [(nodes[i], nodes[j])
+                for i in range(len(nodes)) if not deleted[i]
+                for j in targets[offsets[i]:offsets[i + 1]] if not deleted[j]]
+
+    def neighbors(self, node):
+        i = self._ids[node]
+        if self._deleted[i]:
+            raise KeyError(node)
+        nodes, deleted = self._nodes, self._deleted
+        return [nodes[j] for j in self.targets[self.offsets[i]:self.offsets[i + 1]] if not deleted[j]]
+
+    def has_node(self, node):
+        i = self._ids.get(node)
+        return i is not None and not self._deleted[i]
+
+    def add_node(self, node, attrs=None):
+        raise ValueError("CSRGraph is immutable")
+
+    def add_edge(self, edge, wt=1, label='', attrs=[]):
+        raise ValueError("CSRGraph is immutable")
+
+    def has_edge(self, edge):
+        return self._find_edge(edge) is not None
+
+    def edge_weight(self, edge):
+        position = self._find_edge(edge)
+        return Graph.DEFAULT_WEIGHT if position is None else self.weights[position]
+
+    def del_node(self, node):
+        i = self._ids[node]
+        if self._deleted[i]:
+            raise KeyError(node)
+        self._deleted[i] = 1
+
+    def _find_edge(self, edge):
+        # Position of the edge in the arrays, None if it does not exist.
+        u, v = edge
+        i, j = self._ids.get(u), self._ids.get(v)
+        if i is None or j is None or self._deleted[i] or self._deleted[j]:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        position = bisect_left(self.targets, j, start, end)
+        if position < end and self.targets[position] == j:
+            return position
+        return None
@@ -0,0 +1,83 @@
+import sys
+from array import array
+from graph import CSRGraph
+from mapped_file import HEADER, MappedFile
+
+# The header counts are the number of nodes and of stored edges (both directions).
+MAGIC = b"TXSAGRF1"
+
+
+def save_graph(graph, path):
+    """ Writes any IGraph to path in a compact binary format.
+
+    The file holds, after the header, the uint64 offsets of the node texts,
+    the int64 CSR row offsets, the int64 neighbor ids and the float64 edge
+    weights, followed by the UTF-8 node texts. Rows are sorted, so the file
+    can be memory mapped by load_graph and used as a CSRGraph as is. Nodes
+    must be strings, like the sentences of get_graph. """
+    nodes = graph.nodes()
+    ids = {node: i for i, node in enumerate(nodes)}
+    texts = [node.encode("utf-8") for node in nodes]
+
+    text_offsets = array("Q", [0])
+    for text in texts:
+        text_offsets.append(text_offsets[-1] + len(text))
+
+    offsets = array("q", [0])
+    targets = array("q")
+    weights = array("d")
+    for node in nodes:
+        for j, other in sorted((ids[other], other) for other in graph.neighbors(node)):
+            targets.append(j)
+            weights.append(graph.edge_weight((node, other)))
+        offsets.append(len(targets))
+
+    if sys.byteorder != "little":
+        for values in (text_offsets, offsets, targets, weights):
+            values.byteswap()
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(nodes), len(targets)))
+        for values in (text_offsets, offsets, targets, weights):
+            file.write(values.tobytes())
+        file.write(b"".join(texts))
+
+
+def load_graph(path):
+    """ Memory maps a graph written by save_graph. """
+    return MappedGraph(path)
+
+
+class MappedGraph(MappedFile, CSRGraph):
+    """
+    CSRGraph whose edge arrays are views over a file written by save_graph.
+
+    Only the node texts are decoded when loading; the edges are read from the
+    mapped pages on demand and shared by every process that maps the file.
+    Pickling it only sends the path.
+    """
+
+    MAGIC = MAGIC
+    KIND = "a graph file"
+
+    def _load(self, node_count, edge_count):
+        # The node texts must follow the arrays and end with the file.
+        blob_start = HEADER.size + 8 * (2 * (node_count + 1) + 2 * edge_count)
+        if len(self._mmap) < blob_start:
+            raise ValueError("%s is truncated" % self.path)
+
+        text_offsets, offsets, targets, weights = self._map_sections(
+            HEADER.size, [("Q", node_count + 1), ("q", node_count + 1), ("q", edge_count), ("d", edge_count)])
+        if blob_start + text_offsets[node_count] != len(self._mmap) or offsets[node_count] != edge_count:
+            raise ValueError("%s is truncated or corrupt" % self.path)
+
+        try:
+            nodes = [str(self._mmap[blob_start + text_offsets[i]:blob_start + text_offsets[i + 1]], "utf-8")
+                     for i in range(node_count)]
+        except UnicodeDecodeError:
+            raise ValueError("%s is corrupt" % self.path)
+        CSRGraph.__init__(self, nodes, offsets, targets, weights)
+
+    def close(self):
+        self.offsets = self.targets = self.weights = None
+        super(MappedGraph, self).close()
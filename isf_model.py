@@ -0,0 +1,120 @@
+import hashlib
+import sys
+from array import array
+from math import log10
+from textcleaner import clean_text_by_word as _clean_text_by_words
+from textcleaner import get_text_cleaner as _get_text_cleaner
+from mapped_file import HEADER, MappedFile
+
+# The header counts are the number of terms and the number of documents.
+MAGIC = b"TXSAISF1"
+
+
+def build_isf_model(texts, path, language="english", additional_stopwords=None):
+    """ Streams a corpus through clean_text_by_word and writes the inverse
+    document frequency of every term to path.
+
+    The file holds the sorted vocabulary and a float64 array of weights,
+    log10(documents / documents containing the term), so it can be memory
+    mapped with ISFModel and used by summarize() in place of the per document
+    inverse sentence frequency. Returns the number of documents read. """
+    cleaner = _get_text_cleaner(language, additional_stopwords)
+    document_frequency = {}
+    document_count = 0
+    for text in texts:
+        document_count += 1
+        for word in set(_clean_text_by_words(text, cleaner=cleaner)):
+            if word:
+                document_frequency[word] = document_frequency.get(word, 0) + 1
+
+    # UTF-8 byte order is code point order, so lookups can bisect the encoded terms.
+    terms = sorted(word.encode("utf-8") for word in document_frequency)
+
+    offsets = array("Q", [0])
+    weights = array("d")
+    for term in terms:
+        offsets.append(offsets[-1] + len(term))
+        weights.append(log10(document_count / document_frequency[term.decode("utf-8")]))
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        weights.byteswap()
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(terms), document_count))
+        file.write(offsets.tobytes())
+        file.write(weights.tobytes())
+        file.write(b"".join(terms))
+
+    return document_count
+
+
+class ISFModel(MappedFile):
+    """
+    Read-only, memory-mapped term -> weight table written by build_isf_model.
+
+    The arrays are views over the mapped file, so processes forked after
+    loading share the same pages. Behaves like the dict returned by
+    inverse_sentence_frequency for the operations summarize uses.
+    """
+
+    MAGIC = MAGIC
+    KIND = "an ISF model file"
+
+    def __init__(self, path):
+        self._fingerprint = None
+        super(ISFModel, self).__init__(path)
+
+    def _load(self, term_count, document_count):
+        self.term_count, self.document_count = term_count, document_count
+        # The blob of terms must follow the arrays and end with the file.
+        self._blob_start = HEADER.size + 8 * (2 * term_count + 1)
+        if len(self._mmap) < self._blob_start:
+            raise ValueError("%s is truncated" % self.path)
+
+        self._offsets, self._weights = self._map_sections(HEADER.size, [("Q", term_count + 1), ("d", term_count)])
+        if self._blob_start + self._offsets[term_count] != len(self._mmap):
+            raise ValueError("%s is truncated or corrupt" % self.path)
+
+    def __len__(self):
+        return self.term_count
+
+    @property
+    def fingerprint(self):
+        """ SHA-256 of the model file, used to tell models apart in caches. """
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.sha256(self._mmap).hexdigest()
+        return self._fingerprint
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def __getitem__(self, word):
+        index = self._find(word)
+        if index is None:
+            raise KeyError(word)
+        return self._weights[index]
+
+    def get(self, word, default=None):
+        index = self._find(word)
+        if index is None:
+            return default
+        return self._weights[index]
+
+    def _term(self, index):
+        start = self._blob_start + self._offsets[index]
+        end = self._blob_start + self._offsets[index + 1]
+        return self._mmap[start:end]
+
+    def _find(self, word):
+        key = word.encode("utf-8")
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.term_count and self._term(low) == key:
+            return low
+        return None
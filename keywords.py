@@ -0,0 +1,127 @@
+from array import array
+from csr import CSRMatrix
+from solvers import PageRankSolver
+from textcleaner import clean_words as _clean_words
+
+WINDOW_SIZE = 2
+
+
+def _get_word_ids(filtered_words):
+    """ Maps every lemma to an integer id. Returns the lemma list and the id
+    of every word of the text, -1 for the removed ones. """
+    ids = {}
+    sequence = array("q")
+    for lemma in filtered_words:
+        if lemma:
+            sequence.append(ids.setdefault(lemma, len(ids)))
+        else:
+            sequence.append(-1)
+    return list(ids), sequence
+
+
+def _build_cooccurrence_matrix(sequence, vocabulary_size, window):
+    """ Builds the transition matrix of the co-occurrence graph: two lemmas are
+    connected if they appear at most window - 1 words apart.
+
+    Edges are encoded as integers a * V + b with a < b, sorted and deduplicated,
+    and written straight into CSR arrays; no per edge Python objects are kept
+    besides the sorted key list. Returns the matrix and the node degrees. """
+    keys = array("q")
+    for position, a in enumerate(sequence):
+        if a < 0:
+            continue
+        for b in sequence[position + 1:position + window]:
+            if b >= 0 and a != b:
+                keys.append(a * vocabulary_size + b if a < b else b * vocabulary_size + a)
+
+    edges = array("q")
+    previous = -1
+    for key in sorted(keys):
+        if key != previous:
+            edges.append(key)
+            previous = key
+    del keys
+
+    degrees = array("q", [0]) * vocabulary_size
+    for key in edges:
+        degrees[key // vocabulary_size] += 1
+        degrees[key % vocabulary_size] += 1
+
+    indptr = array("q", [0])
+    for degree in degrees:
+        indptr.append(indptr[-1] + degree)
+
+    # Unweighted graph: row i holds 1 / degree(j) for every neighbor j.
+    indices = array("q", [0]) * len(edges) * 2
+    data = array("d", [0.0]) * len(edges) * 2
+    fill = array("q", indptr[:-1])
+    for key in edges:
+        a, b = divmod(key, vocabulary_size)
+        indices[fill[a]] = b
+        data[fill[a]] = 1.0 / degrees[b]
+        fill[a] += 1
+        indices[fill[b]] = a
+        data[fill[b]] = 1.0 / degrees[a]
+        fill[b] += 1
+
+    return CSRMatrix(indptr, indices, data), degrees
+
+
+def _get_combined_keywords(original_words, sequence, keyword_scores):
+    """ Merges runs of adjacent keywords of the text into phrases, scored with
+    the average score of their words, in order of first appearance. """
+    combined = {}
+    phrase, phrase_scores = [], []
+    for word, word_id in zip(original_words, sequence):
+        if word_id in keyword_scores:
+            phrase.append(word)
+            phrase_scores.append(keyword_scores[word_id])
+            continue
+        if phrase:
+            combined.setdefault(" ".join(phrase), sum(phrase_scores) / len(phrase_scores))
+            phrase, phrase_scores = [], []
+
+    if phrase:
+        combined.setdefault(" ".join(phrase), sum(phrase_scores) / len(phrase_scores))
+    return combined
+
+
+def _format_results(combined_keywords, split, scores):
+    ordered = sorted(combined_keywords.items(), key=lambda item: item[1], reverse=True)
+    if scores:
+        return ordered
+    if split:
+        return [keyword for keyword, _ in ordered]
+    return "\n".join(keyword for keyword, _ in ordered)
+
+
+def keywords(text, ratio=0.2, words=None, language="english", split=False, scores=False, additional_stopwords=None,
+             window=WINDOW_SIZE, deacc=False, solver=None, damping=0.85):
+    """ Returns the most important keywords and keyphrases of the text.
+
+    The lemmas are ranked with PageRank over a sliding window co-occurrence
+    graph; the best ratio of them (or the given number of words) are kept and
+    adjacent keywords of the text are merged into phrases. """
+    if not isinstance(text, str):
+        raise ValueError("Text parameter must be a Unicode object (str)!")
+    if window < 2:
+        raise ValueError("window must be at least 2")
+
+    original_words, filtered_words = _clean_words(text, language, deacc, additional_stopwords)
+    lemmas, sequence = _get_word_ids(filtered_words)
+    if not lemmas:
+        return [] if split or scores else ""
+
+    matrix, degrees = _build_cooccurrence_matrix(sequence, len(lemmas), window)
+
+    if solver is None:
+        solver = PageRankSolver()
+    ranks = solver.solve(matrix, [1.0 / len(lemmas)] * len(lemmas), damping)
+
+    # Lemmas without neighbors are not part of the graph.
+    nodes = [i for i in range(len(lemmas)) if degrees[i] > 0]
+    nodes.sort(key=lambda i: ranks[i], reverse=True)
+    length = int(len(nodes) * ratio) if words is None else min(words, len(nodes))
+    keyword_scores = {i: ranks[i] for i in nodes[:length]}
+
+    return _format_results(_get_combined_keywords(original_words, sequence, keyword_scores), split, scores)
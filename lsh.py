@@ -0,0 +1,68 @@
+import random
+from zlib import crc32
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+class MinHashLSH(object):
+    """
+    Approximate neighbour search for very large documents.
+
+    Every sentence is reduced to a MinHash signature of its set of filtered
+    words and the signatures are split into bands; two sentences become a
+    candidate pair when all the values of at least one band are equal. Only the
+    candidate pairs get an exact similarity weight.
+
+    A pair with Jaccard similarity s is found with probability
+    1 - (1 - s^rows)^bands: more bands raise the recall, more rows per band
+    reduce the number of candidates (and the work).
+
+    After each search, candidate_count holds the number of candidate pairs kept
+    and pair_count the number of pairs the exact search would have compared.
+    """
+
+    def __init__(self, bands=16, rows=4, seed=1):
+        if bands < 1 or rows < 1:
+            raise ValueError("bands and rows must be positive integers")
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+
+        generator = random.Random(seed)
+        self._permutations = [(generator.randint(1, MERSENNE_PRIME - 1), generator.randint(0, MERSENNE_PRIME - 1))
+                              for _ in range(bands * rows)]
+
+        self.candidate_count = 0
+        self.pair_count = 0
+
+    def __repr__(self):
+        return "MinHashLSH(bands=%d, rows=%d, seed=%r)" % (self.bands, self.rows, self.seed)
+
+    def signature(self, words):
+        """ Returns the MinHash signature of a set of words. """
+        hashes = [crc32(word.encode("utf-8")) for word in words]
+        if not hashes:
+            return [MAX_HASH] * len(self._permutations)
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH for a, b in self._permutations]
+
+    def candidate_pairs(self, tokens):
+        """ Given a list of processed sentences, returns the sorted list of
+        (i, j) index pairs, i < j, that share at least one band. """
+        buckets = {}
+        for index, token in enumerate(tokens):
+            signature = self.signature(set(token.split()))
+            for band in range(self.bands):
+                start = band * self.rows
+                key = (band, tuple(signature[start:start + self.rows]))
+                buckets.setdefault(key, []).append(index)
+
+        candidates = set()
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1:]:
+                    candidates.add((i, j))
+
+        self.candidate_count = len(candidates)
+        self.pair_count = len(tokens) * (len(tokens) - 1) // 2
+        return sorted(candidates)
@@ -0,0 +1,85 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+# Magic, then two counts whose meaning depends on the format.
+HEADER = struct.Struct("<8sQQ")
+
+
+class MappedFile(object):
+    """
+    Read-only memory mapping of a file in one of the binary formats of this
+    package (ISF models and graphs): a header, little-endian 8-byte arrays and
+    a trailing blob.
+
+    Subclasses set MAGIC and KIND and implement _load(first_count,
+    second_count), which validates the file and maps its arrays with
+    _map_sections. A file that fails to load raises ValueError and is
+    unmapped. Pickling an instance only sends the path.
+    """
+
+    MAGIC = None
+    KIND = "mapped file"
+
+    def __init__(self, path):
+        self.path = path
+        self._view = None
+        self._sections = []
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError("%s is not %s" % (path, self.KIND))
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, first_count, second_count = HEADER.unpack_from(self._mmap, 0)
+            if magic != self.MAGIC:
+                raise ValueError("%s is not %s" % (path, self.KIND))
+            self._load(first_count, second_count)
+        except BaseException:
+            self._release()
+            raise
+
+    def _load(self, first_count, second_count):
+        raise NotImplementedError
+
+    def _map_sections(self, start, layout):
+        """ Returns views of the consecutive arrays described by layout, a list of
+        (typecode, length) pairs of 8-byte items, starting at offset start. """
+        if self._view is None:
+            self._view = memoryview(self._mmap)
+        sections = []
+        for typecode, length in layout:
+            sections.append(self._view[start:start + 8 * length].cast(typecode))
+            start += 8 * length
+
+        # Big-endian machines pay for a copy instead of using the mapping.
+        if sys.byteorder != "little":
+            for i, section in enumerate(sections):
+                copy = array(section.format, section)
+                copy.byteswap()
+                section.release()
+                sections[i] = copy
+
+        self._sections.extend(sections)
+        return sections
+
+    def __reduce__(self):
+        # Mappings cannot be pickled; other processes map the file again.
+        return type(self), (self.path,)
+
+    def close(self):
+        self._release()
+
+    def _release(self):
+        for view in self._sections + [self._view]:
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,26 +1,148 @@
-CONVERGENCE_THRESHOLD = 0.0001
-def textrank_weighted(graph, initial_value=None, damping=0.85):
-    """Calculates TextRank for an undirected graph"""
-    if initial_value == None: initial_value = 1.0 / len(graph.nodes())
-    scores = dict.fromkeys(graph.nodes(), initial_value)
+import copy
+import time
+from commons import connected_components as _connected_components
+from commons import managed_executor as _managed_executor
+from csr import CSRMatrix
+from solvers import PageRankSolver, SolverReport
 
-    iteration_quantity = 0
-    for iteration_number in range(100):
-        iteration_quantity += 1
-        convergence_achieved = 0
-        for i in graph.nodes():
-            rank = 1 - damping
-            for j in graph.neighbors(i):
-                neighbors_sum = sum(graph.edge_weight((j, k)) for k in graph.neighbors(j))
-                rank += damping * scores[j] * graph.edge_weight((j, i)) / neighbors_sum
 
-            if abs(scores[i] - rank) <= CONVERGENCE_THRESHOLD:
-                convergence_achieved += 1
+def build_transition_matrix(graph, nodes=None):
+    """Returns the graph nodes and a CSR matrix whose row i holds, for every
+    neighbor j of node i, weight(j, i) divided by the total weight of j's edges.
 
-            scores[i] = rank
+    Computing it once turns every PageRank iteration into a single sparse
+    matrix-vector product. nodes restricts the matrix to a set of nodes closed
+    under neighborhood, such as a connected component."""
+    if nodes is None: nodes = graph.nodes()
+    index = {node: i for i, node in enumerate(nodes)}
+    weight_sums = [sum(graph.edge_weight((node, other)) for other in graph.neighbors(node)) for node in nodes]
 
-        if convergence_achieved == len(graph.nodes()):
-            break
+    def normalized_row(node):
+        for other in graph.neighbors(node):
+            j = index[other]
+            if weight_sums[j] != 0:
+                yield j, graph.edge_weight((other, node)) / weight_sums[j]
 
-    return scores
+    return nodes, CSRMatrix.from_rows(normalized_row(node) for node in nodes)
+
+
+def personalization_vector(nodes, personalization):
+    """Returns the teleport weights of the nodes, scaled to average 1 so a
+    uniform personalization gives the plain TextRank scores. Nodes missing
+    from the personalization dict get 0; None if every weight is 0."""
+    weights = [personalization.get(node, 0) for node in nodes]
+    total = sum(weights)
+    if total <= 0:
+        return None
+    return [weight * len(nodes) / total for weight in weights]
+
+
+def complete_graph_scores(nodes, damping=0.85, teleport=None):
+    """Returns the TextRank scores of the complete graph of the nodes with equal
+    weights, in closed form, without building any edge.
+
+    Every node receives (S - x_i) / (N - 1) from the others, so the scores,
+    which add up to S = N, are ((1 - d) t_i + d N / (N - 1)) / (1 + d / (N - 1));
+    all 1 with a uniform teleport vector t. A single node has no edges and gets
+    no score, as remove_unreachable_nodes would drop it."""
+    count = len(nodes)
+    if count < 2:
+        return {}
+    if teleport is None: teleport = [1.0] * count
+    return {node: ((1 - damping) * weight + damping * count / (count - 1)) / (1 + damping / (count - 1))
+            for node, weight in zip(nodes, teleport)}
+
+
+def textrank_weighted(graph, initial_value=None, damping=0.85, solver=None, top_k=None, personalization=None):
+    """Calculates TextRank for an undirected graph.
+
+    solver is a solvers.PageRankSolver; by default, synchronous power
+    iteration that stops when no node changes more than solvers.CONVERGENCE_THRESHOLD.
+    Its report attribute describes the solve.
+
+    If top_k is given, the iteration may stop before converging once the
+    ordering of the top_k nodes is stable; only those scores are reliable.
+
+    personalization, a dict of node -> non negative weight, makes the random
+    jumps land on the nodes proportionally to their weight (personalized
+    PageRank) instead of uniformly."""
+    if solver is None: solver = PageRankSolver()
+    nodes, matrix = build_transition_matrix(graph)
+    if initial_value == None: initial_value = 1.0 / len(nodes)
+
+    teleport = personalization_vector(nodes, personalization) if personalization else None
+    scores = solver.solve(matrix, [initial_value] * len(nodes), damping, top_k, teleport)
+    return dict(zip(nodes, scores))
+
+
+def textrank_from_pairs(nodes, pairs, storage="float64", initial_value=None, damping=0.85, solver=None, top_k=None):
+    """Calculates TextRank for the undirected graph whose edges are given as
+    (i, j, weight) tuples of indices into nodes, without building a Graph.
 
+    The weights are stored as CSRMatrix.from_symmetric_pairs does for storage
+    ("float64", "float32" or "uint16") and the transition matrix is that
+    matrix with every column divided by its sum, so no normalized copy is
+    kept. Nodes without edges are left out, like remove_unreachable_nodes
+    would do; the result is empty if there are no edges."""
+    if solver is None: solver = PageRankSolver()
+    matrix = CSRMatrix.from_symmetric_pairs(len(nodes), pairs, storage)
+    weight_sums = matrix.row_sums()
+    matrix.column_scale = [1.0 / total if total else 0.0 for total in weight_sums]
+
+    reachable = [i for i, total in enumerate(weight_sums) if total]
+    if not reachable:
+        return {}
+    if initial_value == None: initial_value = 1.0 / len(reachable)
+
+    # Isolated nodes have no neighbors and only feed themselves the teleport
+    # term, so they do not change the scores of the others.
+    scores = solver.solve(matrix, [initial_value] * len(nodes), damping, top_k)
+    return {nodes[i]: scores[i] for i in reachable}
+
+
+def _solve_component(matrix, initial_value, damping, solver, top_k):
+    scores = solver.solve(matrix, [initial_value] * len(matrix), damping, top_k and min(top_k, len(matrix)))
+    return scores, solver.report
+
+
+def textrank_by_components(graph, initial_value=None, damping=0.85, solver=None, top_k=None, executor=None,
+                           max_workers=None):
+    """Calculates TextRank solving every connected component of the graph on
+    its own, so small components stop after a few iterations instead of
+    waiting for the slowest node of the whole graph.
+
+    The transition matrix is block diagonal, and the unnormalized scores of a
+    component add up to its number of nodes, as they do in the solve of the
+    whole graph, so the scores are recombined without any rescaling. Every
+    component starts from the same initial value as the whole graph would.
+
+    executor solves the components in parallel: "process", "thread" or a
+    concurrent.futures.Executor (left running). solver.report summarizes the
+    solves: the largest iteration count and residual and the total time."""
+    if solver is None: solver = PageRankSolver()
+    if initial_value == None: initial_value = 1.0 / len(graph.nodes())
+    started = time.perf_counter()
+
+    components = [build_transition_matrix(graph, nodes) for nodes in _connected_components(graph)]
+    # Each solve gets its own copy of the solver, which keeps per solve state.
+    arguments = [(matrix, initial_value, damping, copy.copy(solver), top_k) for _, matrix in components]
+
+    with _managed_executor(executor, max_workers) as pool:
+        if pool is None:
+            results = [_solve_component(*argument) for argument in arguments]
+        else:
+            # Largest components first, so they do not end up last in a worker's queue.
+            order = sorted(range(len(arguments)), key=lambda i: len(arguments[i][0]), reverse=True)
+            jobs = {i: pool.submit(_solve_component, *arguments[i]) for i in order}
+            results = [jobs[i].result() for i in range(len(arguments))]
+
+    scores = {}
+    for (nodes, _), (component_scores, _) in zip(components, results):
+        scores.update(zip(nodes, component_scores))
+
+    reports = [report for _, report in results]
+    solver.report = SolverReport(solver.method, max(report.iterations for report in reports),
+                                 max(report.residual for report in reports), time.perf_counter() - started,
+                                 all(report.converged for report in reports),
+                                 all(report.top_k_stable for report in reports))
+    return scores
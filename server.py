@@ -0,0 +1,297 @@
+import getopt
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+
+from summarizer import summarize
+from textcleaner import get_text_cleaner
+
+SUMMARIZE_OPTIONS = ("ratio", "words", "language", "split", "scores", "additional_stopwords")
+# Seconds a request waits for its summary before the server answers 504.
+REQUEST_TIMEOUT = 60
+
+
+def _warm_worker(language):
+    # Builds the stemmer and stopword set before the first request arrives.
+    get_text_cleaner(language)
+
+
+def _summarize_requests(requests):
+    # Returns a (summary, error, internal) triple per request: bad input raises
+    # ValueError or TypeError, anything else is a failure of the server.
+    results = []
+    for text, options in requests:
+        try:
+            results.append((summarize(text, **options), None, False))
+        except (ValueError, TypeError) as error:
+            results.append((None, "%s: %s" % (type(error).__name__, error), False))
+        except Exception as error:
+            results.append((None, "%s: %s" % (type(error).__name__, error), True))
+    return results
+
+
+class SummarizationError(Exception):
+    """ The server failed to summarize a request through no fault of its input. """
+
+
+class Statistics(object):
+    """ Thread-safe request counters and a window of recent latencies. """
+
+    def __init__(self, window=10000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+
+    def record_batch(self):
+        with self._lock:
+            self.batches += 1
+
+    def record_request(self, latency, failed):
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+            self._latencies.append(latency)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            uptime = time.monotonic() - self.started
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "batches": self.batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0,
+                "uptime": uptime,
+                "throughput": self.requests / uptime if uptime else 0,
+                "latency_p50": _percentile(latencies, 0.50),
+                "latency_p99": _percentile(latencies, 0.99),
+            }
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class MicroBatcher(object):
+    """
+    Groups concurrent requests into batches for a pool of warm worker processes.
+
+    A batch is sent as soon as it holds max_batch_size requests or when
+    batch_window seconds have passed since its first request arrived. It is
+    split into one sub-batch per worker, so a burst keeps all of them busy.
+
+    If the pool breaks (e.g. a worker process is killed) the requests it held
+    fail with SummarizationError and a new pool is started.
+    """
+
+    def __init__(self, workers=None, max_batch_size=16, batch_window=0.005, language="english"):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.language = language
+        self.statistics = Statistics()
+
+        self._queue = Queue()
+        self._pool_lock = threading.Lock()
+        self._closed = False
+        self._pool = self._create_pool()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, text, options):
+        """ Returns a Future with the (summary, error) pair of the request; error
+        describes invalid input. Server failures raise SummarizationError. """
+        future = Future()
+        self._queue.put((text, options, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        with self._pool_lock:
+            self._closed = True
+        self._pool.shutdown()
+
+    def _create_pool(self):
+        return ProcessPoolExecutor(self.workers, initializer=_warm_worker, initargs=(self.language,))
+
+    def _replace_pool(self, broken):
+        # Several failed jobs may report the same broken pool; it is replaced once.
+        with self._pool_lock:
+            if self._pool is not broken or self._closed:
+                return
+            self._pool = self._create_pool()
+        # Outside the lock: cancelling the pending jobs runs their callbacks here.
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self.statistics.record_batch()
+            parts = min(self.workers, len(batch))
+            for part in range(parts):
+                self._dispatch(batch[part::parts])
+
+    def _dispatch(self, batch):
+        with self._pool_lock:
+            pool = self._pool
+        try:
+            job = pool.submit(_summarize_requests, [(text, options) for text, options, _ in batch])
+        except Exception as error:
+            self._fail(batch, error)
+            self._replace_pool(pool)
+            return
+        job.add_done_callback(lambda job, batch=batch, pool=pool: self._deliver(job, batch, pool))
+
+    def _deliver(self, job, batch, pool):
+        try:
+            results = job.result()
+        except Exception as error:
+            self._fail(batch, error)
+            self._replace_pool(pool)
+            return
+        for (_, _, future), (summary, error, internal) in zip(batch, results):
+            if internal:
+                future.set_exception(SummarizationError(error))
+            else:
+                future.set_result((summary, error))
+
+    @staticmethod
+    def _fail(batch, error):
+        failure = SummarizationError("%s: %s" % (type(error).__name__, error))
+        for _, _, future in batch:
+            future.set_exception(failure)
+
+
+class SummarizationRequestHandler(BaseHTTPRequestHandler):
+    """ POST /summarize with a JSON object holding "text" and, optionally, the
+    summarize() options; GET /stats returns the server counters. """
+
+    def do_GET(self):
+        if self.path != "/stats":
+            return self._send(404, {"error": "Not found"})
+        self._send(200, self.server.batcher.statistics.snapshot())
+
+    def do_POST(self):
+        if self.path != "/summarize":
+            return self._send(404, {"error": "Not found"})
+
+        started = time.monotonic()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            text = request["text"]
+            options = {key: request[key] for key in SUMMARIZE_OPTIONS if key in request}
+        except (ValueError, KeyError, TypeError) as error:
+            return self._send(400, {"error": "Invalid request: %s" % error})
+
+        statistics = self.server.batcher.statistics
+        try:
+            summary, error = self.server.batcher.submit(text, options).result(self.server.request_timeout)
+        except TimeoutError:
+            statistics.record_request(time.monotonic() - started, True)
+            return self._send(504, {"error": "Timed out"})
+        except SummarizationError as error:
+            statistics.record_request(time.monotonic() - started, True)
+            return self._send(500, {"error": str(error)})
+        statistics.record_request(time.monotonic() - started, error is not None)
+
+        if error is not None:
+            return self._send(400, {"error": error})
+        self._send(200, {"summary": summary})
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class SummarizationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, batcher, request_timeout=REQUEST_TIMEOUT):
+        super().__init__(address, SummarizationRequestHandler)
+        self.batcher = batcher
+        self.request_timeout = request_timeout
+
+
+def usage():
+    return "Usage: python server.py [--host HOST] [--port PORT] [--workers N] [--batch-size N] [--batch-window SECONDS] " \
+           "[--timeout SECONDS]"
+
+
+def main():
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "h", ["host=", "port=", "workers=", "batch-size=", "batch-window=",
+                                                       "timeout=", "help"])
+    except getopt.GetoptError as error:
+        print(error)
+        print(usage())
+        sys.exit(2)
+
+    host, port = "127.0.0.1", 8000
+    workers, batch_size, batch_window, timeout = None, 16, 0.005, REQUEST_TIMEOUT
+    for option, value in opts:
+        if option in ("-h", "--help"):
+            print(usage())
+            sys.exit()
+        elif option == "--host":
+            host = value
+        elif option == "--port":
+            port = int(value)
+        elif option == "--workers":
+            workers = int(value)
+        elif option == "--batch-size":
+            batch_size = int(value)
+        elif option == "--batch-window":
+            batch_window = float(value)
+        elif option == "--timeout":
+            timeout = float(value)
+
+    batcher = MicroBatcher(workers, batch_size, batch_window)
+    server = SummarizationServer((host, port), batcher, timeout)
+    print("Serving on http://%s:%d" % (host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import heapq
+from math import sqrt
+from graph import IGraph
+
+
+def term_weight(isf_document, word):
+    """ Returns the ISF weight of a word, defaulting to 1 for unknown words
+    exactly like summarizer._get_similarity does. """
+    if word not in isf_document:
+        return 1
+    return isf_document[word]
+
+
+class TfIsfMatrix(object):
+    """
+    Sparse sentence x term TF-ISF matrix of a document.
+
+    Rows are stored as dicts of term -> count and the columns as posting lists
+    of (row, count), so every pairwise similarity can be obtained with a single
+    row-by-row sparse product (Gustavson's algorithm) instead of comparing all
+    the word lists against each other.
+
+    The weights are the same ones returned by summarizer._get_similarity:
+
+        sim(a, b) = sum_w (c_a + c_b) * c_a * c_b * d_w^2 / (norm_a * norm_b)
+        norm_x = sqrt(sum_w c_x * d_w^2)
+    """
+
+    def __init__(self, tokens, isf_document):
+        self.rows = []
+        self.squared_weights = {}
+        self.norms = []
+
+        for token in tokens:
+            row = {}
+            for word in token.split():
+                row[word] = row.get(word, 0) + 1
+            self.rows.append(row)
+
+            norm = 0
+            for word, count in row.items():
+                if word not in self.squared_weights:
+                    self.squared_weights[word] = term_weight(isf_document, word) ** 2
+                norm += count * self.squared_weights[word]
+            self.norms.append(sqrt(norm))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def similarity(self, i, j):
+        """ Returns the similarity between rows i and j. """
+        row_i, row_j = self.rows[i], self.rows[j]
+        if len(row_j) < len(row_i):
+            row_i, row_j = row_j, row_i
+
+        dot = 0
+        for word, c1 in row_i.items():
+            c2 = row_j.get(word)
+            if c2 is not None:
+                dot += (c1 + c2) * c1 * c2 * self.squared_weights[word]
+
+        return self._normalize(dot, i, j)
+
+    def pairs(self, max_neighbors=None, min_weight=None, candidates=None):
+        """ Yields (i, j, similarity) for every pair i < j with a non zero similarity.
+
+        The posting lists are filled while the rows are visited, so each row is
+        only multiplied against the rows that precede it and every unordered
+        pair is computed once.
+
+        If min_weight is given, pairs with a lower similarity are dropped as soon
+        as they are computed. If max_neighbors is given, only the pairs that are
+        among the max_neighbors strongest ones of at least one of their two rows
+        are kept; they are tracked with one bounded heap per row, so memory is
+        O(rows * max_neighbors) instead of O(rows^2).
+
+        If candidates, an iterable of (i, j) pairs, is given, only those pairs
+        are weighted instead of searching all of them. """
+        if candidates is None:
+            pairs = self._all_pairs()
+        else:
+            pairs = self._candidate_pairs(candidates)
+        if min_weight is not None:
+            pairs = ((i, j, similarity) for i, j, similarity in pairs if similarity >= min_weight)
+        if max_neighbors is None:
+            return pairs
+        return self._strongest_pairs(pairs, max_neighbors)
+
+    def _all_pairs(self):
+        postings = {}
+        for j, row_j in enumerate(self.rows):
+            accumulator = {}
+            for word, c2 in row_j.items():
+                weight = self.squared_weights[word]
+                posting = postings.setdefault(word, [])
+                for i, c1 in posting:
+                    accumulator[i] = accumulator.get(i, 0) + (c1 + c2) * c1 * c2 * weight
+                posting.append((j, c2))
+
+            for i in sorted(accumulator):
+                similarity = self._normalize(accumulator[i], i, j)
+                if similarity != 0:
+                    yield i, j, similarity
+
+    def _candidate_pairs(self, candidates):
+        for i, j in candidates:
+            similarity = self.similarity(i, j)
+            if similarity != 0:
+                yield i, j, similarity
+
+    def _strongest_pairs(self, pairs, max_neighbors):
+        if max_neighbors < 1:
+            raise ValueError("max_neighbors must be a positive integer")
+
+        heaps = [[] for _ in self.rows]
+        for i, j, similarity in pairs:
+            for row, other in ((i, j), (j, i)):
+                heap = heaps[row]
+                if len(heap) < max_neighbors:
+                    heapq.heappush(heap, (similarity, other))
+                elif (similarity, other) > heap[0]:
+                    heapq.heapreplace(heap, (similarity, other))
+
+        kept = {}
+        for row, heap in enumerate(heaps):
+            for similarity, other in heap:
+                kept[(min(row, other), max(row, other))] = similarity
+
+        for i, j in sorted(kept):
+            yield i, j, kept[(i, j)]
+
+    def _normalize(self, dot, i, j):
+        denominator = self.norms[i] * self.norms[j]
+        if dot == 0 or denominator == 0:
+            return 0
+        return dot / denominator
+
+
+class SimilarityGraph(IGraph):
+    """
+    Read-only IGraph view of the similarity graph of an AnalyzedDocument
+    whose edges are computed on demand.
+
+    The nodes are the distinct sentence tokens, like in build_graph. The
+    neighbors of a node are looked up in the posting index of the document
+    and every similarity is computed at most once, so inspecting a few
+    neighborhoods costs what they touch instead of all N^2 pairs. edges()
+    visits every node.
+
+    del_node only hides a node, so remove_unreachable_nodes works on it.
+    """
+
+    def __init__(self, document, isf_document=None):
+        self.document = document
+        self._nodes = list(dict.fromkeys(document.tokens))
+        self._ids = {node: i for i, node in enumerate(self._nodes)}
+        self._matrix = TfIsfMatrix(self._nodes, document.isf if isf_document is None else isf_document)
+        self._weights = {}
+        self._neighbors = {}
+        self._deleted = set()
+
+    def nodes(self):
+        return [node for i, node in enumerate(self._nodes) if i not in self._deleted]
+
+    def edges(self):
+        return [(node, other) for node in self.nodes() for other in self.neighbors(node)]
+
+    def neighbors(self, node):
+        i = self._id(node)
+        if i not in self._neighbors:
+            self._neighbors[i] = [j for j in self._candidates(i) if self._weight(i, j) != 0]
+        return [self._nodes[j] for j in self._neighbors[i] if j not in self._deleted]
+
+    def has_node(self, node):
+        i = self._ids.get(node)
+        return i is not None and i not in self._deleted
+
+    def add_node(self, node, attrs=None):
+        raise ValueError("SimilarityGraph is read-only")
+
+    def add_edge(self, edge, wt=1, label='', attrs=[]):
+        raise ValueError("SimilarityGraph is read-only")
+
+    def has_edge(self, edge):
+        return self.edge_weight(edge) != 0
+
+    def edge_weight(self, edge):
+        u, v = edge
+        if not (self.has_node(u) and self.has_node(v)):
+            return 0
+        i, j = self._ids[u], self._ids[v]
+        return 0 if i == j else self._weight(i, j)
+
+    def del_node(self, node):
+        self._deleted.add(self._id(node))
+
+    def _id(self, node):
+        i = self._ids[node]
+        if i in self._deleted:
+            raise KeyError(node)
+        return i
+
+    def _candidates(self, i):
+        # Nodes sharing at least one word with node i, in node order.
+        postings, ids, sentences = self.document.postings, self._ids, self.document.tokens
+        candidates = set()
+        for word in self._matrix.rows[i]:
+            candidates.update(ids[sentences[sentence_id]] for sentence_id in postings.get(word, ()))
+        candidates.discard(i)
+        return sorted(candidates)
+
+    def _weight(self, i, j):
+        key = (i, j) if i < j else (j, i)
+        if key not in self._weights:
+            self._weights[key] = self._matrix.similarity(*key)
+        return self._weights[key]
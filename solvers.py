@@ -0,0 +1,280 @@
+import heapq
+import time
+from collections import namedtuple
+from math import sqrt
+
+CONVERGENCE_THRESHOLD = 0.0001
+MAX_ITERATIONS = 100
+
+# Diagnostics of the last solve: number of iterations (matrix-vector products
+# for the Krylov method), residual under the stopping rule, seconds spent,
+# whether the stopping rule was met before max_iterations and whether the
+# solve stopped early because the top-k ranking was stable.
+SolverReport = namedtuple("SolverReport", ["method", "iterations", "residual", "wall_time", "converged",
+                                           "top_k_stable"])
+
+
+def _max_norm(vector):
+    return max((abs(value) for value in vector), default=0)
+
+
+def _l1_norm(vector):
+    return sum(abs(value) for value in vector)
+
+
+def _l2_norm(vector):
+    return sqrt(sum(value * value for value in vector))
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class _TopKTracker(object):
+    """ Decides when the ordered top-k nodes of an iteration can be trusted. """
+
+    def __init__(self, k):
+        self.k = k
+        self.stable = False
+
+    def is_stable(self, scores, error_bound):
+        """ True if every gap among the top k + 1 scores is larger than twice
+        error_bound, a bound of the L1 distance to the fixed point. Then no
+        score can cross another one anymore, so the top k nodes and their order
+        are those of the fixed point. """
+        top = heapq.nlargest(self.k + 1, range(len(scores)), key=scores.__getitem__)
+        gaps = [scores[a] - scores[b] for a, b in zip(top, top[1:])]
+        self.stable = all(gap > 2 * error_bound for gap in gaps)
+        return self.stable
+
+
+class PageRankSolver(object):
+    """
+    Solves the TextRank fixed point x = (1 - d) t + d * M x for a transition
+    matrix M built by pagerank_weighted.build_transition_matrix. The teleport
+    vector t is all ones unless a personalized one is given to solve.
+
+    Methods:
+        power         synchronous power iteration.
+        gauss-seidel  in-place sweeps, each node using the newest values.
+        aitken        power iteration with componentwise Aitken delta-squared
+                      extrapolation every extrapolation_period iterations.
+        krylov        restarted GMRES on the linear system (I - d M) x = (1 - d) t.
+        adaptive      power iteration that stops updating the nodes whose
+                      change fell below the tolerance.
+
+    Stopping rules:
+        node  every node changed at most tolerance (max norm of the residual).
+        l1    the L1 norm of the residual is at most tolerance.
+
+    If solve is given top_k, iterating also stops as soon as the ordered
+    top_k nodes provably match those of the fixed point (see _TopKTracker).
+    The error bound comes from the residual x - (1 - d) t - d M x, since the
+    distance to the fixed point is at most its L1 norm divided by 1 - d.
+
+    After each solve, report holds a SolverReport.
+    """
+
+    METHODS = ("power", "gauss-seidel", "aitken", "krylov", "adaptive")
+    STOPPING_RULES = ("node", "l1")
+
+    def __init__(self, method="power", stopping_rule="node", tolerance=CONVERGENCE_THRESHOLD,
+                 max_iterations=MAX_ITERATIONS, extrapolation_period=10, restart=20):
+        if method not in self.METHODS:
+            raise ValueError("Valid methods are: " + ", ".join(self.METHODS))
+        if stopping_rule not in self.STOPPING_RULES:
+            raise ValueError("Valid stopping rules are: " + ", ".join(self.STOPPING_RULES))
+
+        self.method = method
+        self.stopping_rule = stopping_rule
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.extrapolation_period = extrapolation_period
+        self.restart = restart
+        self.report = None
+
+    def __repr__(self):
+        return "PageRankSolver(method=%r, stopping_rule=%r, tolerance=%r, max_iterations=%r, " \
+               "extrapolation_period=%r, restart=%r)" % (self.method, self.stopping_rule, self.tolerance,
+                                                         self.max_iterations, self.extrapolation_period, self.restart)
+
+    def solve(self, matrix, scores, damping, top_k=None, teleport=None):
+        """ Returns the list of scores, starting the iteration from scores.
+
+        teleport, a list with a non negative weight per node averaging 1,
+        biases the ranking towards the nodes with higher weights. """
+        started = time.perf_counter()
+        # The state of a solve is passed down instead of kept on the instance, so
+        # one solver can be shared by threads; only the last report is stored.
+        if teleport is None:
+            base = [1 - damping] * len(scores)
+        else:
+            base = [(1 - damping) * weight for weight in teleport]
+        tracker = _TopKTracker(min(top_k, len(scores))) if top_k else None
+        solve = getattr(self, "_solve_" + self.method.replace("-", "_"))
+        scores, iterations, residual = solve(matrix, list(scores), damping, base, tracker)
+        self.report = SolverReport(self.method, iterations, residual, time.perf_counter() - started,
+                                   residual <= self.tolerance, tracker is not None and tracker.stable)
+        return scores
+
+    @staticmethod
+    def _top_k_stable(tracker, scores, error_bound):
+        return tracker is not None and tracker.is_stable(scores, error_bound)
+
+    def _top_k_certified(self, tracker, matrix, scores, damping, base, changes):
+        # The changes of in-place updates only estimate the error; if the
+        # estimate already separates the top k, the residual of a power step
+        # from the current scores gives the actual bound.
+        if not self._top_k_stable(tracker, scores, damping / (1 - damping) * _l1_norm(changes)):
+            return False
+        residual = [rank - score for rank, score in zip(self._step(matrix, scores, damping, base), scores)]
+        return tracker.is_stable(scores, _l1_norm(residual) / (1 - damping))
+
+    def _norm(self, vector):
+        return _max_norm(vector) if self.stopping_rule == "node" else _l1_norm(vector)
+
+    @staticmethod
+    def _step(matrix, scores, damping, base):
+        return [constant + damping * value for constant, value in zip(base, matrix.matvec(scores))]
+
+    def _solve_power(self, matrix, scores, damping, base, tracker):
+        residual = float("inf")
+        iterations = 0
+        while iterations < self.max_iterations:
+            ranks = self._step(matrix, scores, damping, base)
+            iterations += 1
+            changes = [rank - score for rank, score in zip(ranks, scores)]
+            residual = self._norm(changes)
+            scores = ranks
+            if residual <= self.tolerance:
+                break
+            # The L1 norm of M is 1, so the distance to the fixed point is at
+            # most d / (1 - d) times the L1 norm of the last change.
+            if self._top_k_stable(tracker, scores, damping / (1 - damping) * _l1_norm(changes)):
+                break
+        return scores, iterations, residual
+
+    def _solve_gauss_seidel(self, matrix, scores, damping, base, tracker):
+        residual = float("inf")
+        iterations = 0
+        while iterations < self.max_iterations:
+            changes = []
+            for i in range(len(scores)):
+                rank = base[i] + damping * matrix.dot_row(i, scores)
+                changes.append(rank - scores[i])
+                scores[i] = rank
+            iterations += 1
+            residual = self._norm(changes)
+            if residual <= self.tolerance or self._top_k_certified(tracker, matrix, scores, damping, base, changes):
+                break
+        return scores, iterations, residual
+
+    def _solve_aitken(self, matrix, scores, damping, base, tracker):
+        history = [scores]
+        residual = float("inf")
+        iterations = 0
+        while iterations < self.max_iterations:
+            ranks = self._step(matrix, scores, damping, base)
+            iterations += 1
+            changes = [rank - score for rank, score in zip(ranks, scores)]
+            residual = self._norm(changes)
+            scores = ranks
+            # Every iterate is a power step, even right after an extrapolation.
+            if residual <= self.tolerance or self._top_k_stable(tracker, scores,
+                                                                 damping / (1 - damping) * _l1_norm(changes)):
+                break
+
+            history = history[-2:] + [scores]
+            if iterations % self.extrapolation_period == 0 and len(history) == 3:
+                scores = self._extrapolate(*history)
+                history = [scores]
+        return scores, iterations, residual
+
+    @staticmethod
+    def _extrapolate(x0, x1, x2):
+        extrapolated = []
+        for a, b, c in zip(x0, x1, x2):
+            denominator = c - 2 * b + a
+            if abs(denominator) > 1e-12:
+                extrapolated.append(c - (c - b) ** 2 / denominator)
+            else:
+                extrapolated.append(c)
+        return extrapolated
+
+    def _solve_adaptive(self, matrix, scores, damping, base, tracker):
+        # With the L1 rule a node is frozen once its share of the tolerance is met.
+        threshold = self.tolerance if self.stopping_rule == "node" else self.tolerance / len(scores)
+        active = list(range(len(scores)))
+        residual = float("inf")
+        iterations = 0
+        while active and iterations < self.max_iterations:
+            ranks = [base[i] + damping * matrix.dot_row(i, scores) for i in active]
+            iterations += 1
+            changes = [rank - scores[i] for i, rank in zip(active, ranks)]
+            for i, rank in zip(active, ranks):
+                scores[i] = rank
+
+            # Converged nodes keep their value but still feed their neighbors.
+            residual = self._norm(changes)
+            if residual <= self.tolerance or self._top_k_certified(tracker, matrix, scores, damping, base, changes):
+                break
+            active = [i for i, change in zip(active, changes) if abs(change) > threshold]
+        return scores, iterations, residual
+
+    def _solve_krylov(self, matrix, scores, damping, base, tracker):
+        # Restarted GMRES on A x = b with A = I - d M and b = (1 - d) t. The
+        # residual b - A x is the change a power iteration step would make, so
+        # the stopping rules have the same meaning as for the other methods.
+        n = len(scores)
+        # Bound of the rule norm given the 2-norm estimated inside a cycle.
+        scale = 1 if self.stopping_rule == "node" else sqrt(n)
+
+        def apply(vector):
+            return [value - damping * product for value, product in zip(vector, matrix.matvec(vector))]
+
+        iterations = 0
+        while True:
+            residual_vector = [rank - score for rank, score in zip(self._step(matrix, scores, damping, base), scores)]
+            residual = self._norm(residual_vector)
+            if (residual <= self.tolerance or iterations >= self.max_iterations
+                    or self._top_k_stable(tracker, scores, _l1_norm(residual_vector) / (1 - damping))):
+                return scores, iterations, residual
+
+            beta = _l2_norm(residual_vector)
+            basis = [[value / beta for value in residual_vector]]
+            hessenberg = []
+            rotations = []
+            g = [beta]
+
+            for k in range(min(self.restart, self.max_iterations - iterations)):
+                w = apply(basis[k])
+                iterations += 1
+
+                column = []
+                for vector in basis:
+                    h = _dot(w, vector)
+                    column.append(h)
+                    w = [a - h * b for a, b in zip(w, vector)]
+                h_next = _l2_norm(w)
+
+                for i, (c, s) in enumerate(rotations):
+                    column[i], column[i + 1] = c * column[i] + s * column[i + 1], -s * column[i] + c * column[i + 1]
+                denominator = sqrt(column[k] ** 2 + h_next ** 2)
+                c, s = column[k] / denominator, h_next / denominator
+                rotations.append((c, s))
+                column[k] = denominator
+                hessenberg.append(column)
+                g.append(-s * g[k])
+                g[k] = c * g[k]
+
+                if h_next == 0 or abs(g[k + 1]) * scale <= self.tolerance:
+                    break
+                basis.append([value / h_next for value in w])
+
+            # Back substitution of the triangular system and update of the solution.
+            size = len(hessenberg)
+            y = [0] * size
+            for i in reversed(range(size)):
+                y[i] = (g[i] - sum(hessenberg[j][i] * y[j] for j in range(i + 1, size))) / hessenberg[i][i]
+            for j in range(size):
+                scores = [score + y[j] * value for score, value in zip(scores, basis[j])]
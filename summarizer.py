@@ -1,42 +1,59 @@
-from math import log10,sqrt
-from stopwords import get_stopwords_by_language
+import copy
+import heapq
+from math import ceil, sqrt
+from document import AnalyzedDocument
+from syntactic_unit import SyntacticUnit
+from cache import cache_key as _cache_key
+from cache import mapping_fingerprint as _mapping_fingerprint
+from cache import text_digest as _text_digest
 from pagerank_weighted import textrank_weighted as _textrank
+from pagerank_weighted import textrank_by_components as _textrank_by_components
+from pagerank_weighted import textrank_from_pairs as _textrank_from_pairs
+from pagerank_weighted import complete_graph_scores as _complete_graph_scores
+from pagerank_weighted import build_transition_matrix as _build_transition_matrix
+from pagerank_weighted import personalization_vector as _personalization_vector
+from solvers import PageRankSolver
 from textcleaner import clean_text_by_sentences as _clean_text_by_sentences
 from textcleaner import clean_text_by_word as _clean_text_by_words
 from commons import build_graph as _build_graph
+from graph import CSRGraph as _CSRGraph
 from commons import remove_unreachable_nodes as _remove_unreachable_nodes
+from commons import managed_executor as _managed_executor
+from similarity import TfIsfMatrix as _TfIsfMatrix
+from similarity import SimilarityGraph as _SimilarityGraph
 
 
-def _set_graph_edge_weights(isf_document,graph):
-    for sentence_1 in graph.nodes():
-        for sentence_2 in graph.nodes():
+def _get_similarity_pairs(isf_document,nodes,max_neighbors=None,min_weight=None,lsh=None):
+    # Builds the sparse TF-ISF matrix once and yields every non zero similarity as
+    # (i, j, weight) with i < j indices into nodes. The optional limits are applied
+    # while the similarities are computed, so the full graph is never materialized.
+    matrix = _TfIsfMatrix(nodes, isf_document)
 
-            edge = (sentence_1, sentence_2)
-            if sentence_1 != sentence_2 and not graph.has_edge(edge):
-                similarity = _get_similarity(isf_document,sentence_1, sentence_2)
-                if similarity != 0:
-                    graph.add_edge(edge, similarity)
+    # With an approximate neighbour search only the candidate pairs are weighted.
+    candidates = lsh.candidate_pairs(nodes) if lsh is not None else None
 
-    # Handles the case in which all similarities are zero.
-    # The resultant summary will consist of random sentences.
-    if all(graph.edge_weight(edge) == 0 for edge in graph.edges()):
-        _create_valid_graph(graph)
+    return matrix.pairs(max_neighbors, min_weight, candidates)
 
 
-def _create_valid_graph(graph):
+def _set_graph_edge_weights(isf_document,graph,max_neighbors=None,min_weight=None,lsh=None):
+    # Loads every non zero similarity in bulk. If all similarities are zero no edge
+    # is added; the summarizers then rank the sentences as if they were all
+    # connected with the same weight, without materializing that graph.
     nodes = graph.nodes()
+    pairs = _get_similarity_pairs(isf_document, nodes, max_neighbors, min_weight, lsh)
+    graph.add_edges_from((nodes[i], nodes[j], similarity) for i, j, similarity in pairs)
 
-    for i in range(len(nodes)):
-        for j in range(len(nodes)):
-            if i == j:
-                continue
 
-            edge = (nodes[i], nodes[j])
-
-            if graph.has_edge(edge):
-                graph.del_edge(edge)
+def _build_similarity_graph(tokens, isf_document, max_neighbors=None, min_weight=None, lsh=None, immutable=False):
+    # Creates the graph and calculates the similarity coefficient for every pair of nodes.
+    if immutable:
+        nodes = list(dict.fromkeys(tokens))
+        pairs = _get_similarity_pairs(isf_document, nodes, max_neighbors, min_weight, lsh)
+        return _CSRGraph.from_edges(nodes, pairs)
 
-            graph.add_edge(edge, 1)
+    graph = _build_graph(tokens)
+    _set_graph_edge_weights(isf_document,graph,max_neighbors,min_weight,lsh)
+    return graph
 
 
 def _get_similarity(isf_document,s1, s2):
@@ -84,13 +101,26 @@ def _format_results(extracted_sentences, split, score):
     return "\n".join([sentence.text for sentence in extracted_sentences])
 
 
+def _ranking_to_sentences(ranking):
+    sentences = []
+    for text, score, index in ranking:
+        sentence = SyntacticUnit(text)
+        sentence.score = score
+        sentence.index = index
+        sentences.append(sentence)
+    return sentences
+
+
 def _add_scores_to_sentences(sentences, scores):
+    # Returns scored shallow copies of the sentences, so the units of a shared
+    # AnalyzedDocument are never modified by concurrent summaries.
+    scored = []
     for sentence in sentences:
+        sentence = copy.copy(sentence)
         # Adds the score to the object if it has one.
-        if sentence.token in scores:
-            sentence.score = scores[sentence.token]
-        else:
-            sentence.score = 0
+        sentence.score = scores.get(sentence.token, 0)
+        scored.append(sentence)
+    return scored
 
 
 def _get_sentences_with_word_count(sentences, words):
@@ -128,76 +158,305 @@ def _extract_most_important_sentences(sentences, ratio, words):
         return _get_sentences_with_word_count(sentences, words)
 
 
-def summarize(text, ratio=0.2, words=None, language="english", split=False, scores=False, additional_stopwords=None):
-    if not isinstance(text, str):
+def _analyze(text, language="english", additional_stopwords=None):
+    # Documents that were already analyzed are used as they are.
+    if isinstance(text, AnalyzedDocument):
+        return text
+    return AnalyzedDocument(text, language, additional_stopwords)
+
+
+def _count_sentences_to_extract(sentences, ratio, words):
+    """ Returns how many of the best sentences can end up in the summary. """
+    if not sentences:
+        return 0
+    if words is None:
+        return int(len(sentences) * ratio)
+
+    # Every selected sentence but the last one keeps the word count below the
+    # target, so no more than words / (shortest sentence) + 1 are selected, and
+    # one more is looked at to decide when to stop.
+    shortest = min(len(sentence.text.split()) for sentence in sentences)
+    return min(len(sentences), int(ceil(words / max(shortest, 1))) + 2)
+
+
+def _extract_top_sentences(sentences, ratio, words, count):
+    # Partial selection with a heap; like sorted(), nlargest is stable on ties.
+    best = heapq.nlargest(count, sentences, key=lambda s: s.score)
+    return _extract_most_important_sentences(best, 1, words) if words is not None else best
+
+
+def summarize(text, ratio=0.2, words=None, language="english", split=False, scores=False, additional_stopwords=None,
+              max_neighbors=None, min_weight=None, lsh=None, isf=None, cache=None, solver=None, early_stopping=False,
+              by_components=False, component_executor=None, weight_storage=None, immutable_graph=False):
+    """ Returns the most important sentences of the text.
+
+    text can be a str or an AnalyzedDocument; in the latter case its own
+    language and additional stopwords are used.
+
+    max_neighbors keeps only the strongest similarities of each sentence and
+    min_weight drops the similarities below the given value, which bounds the
+    size of the graph for long documents.
+
+    lsh, a lsh.MinHashLSH instance, replaces the exact all pairs search with an
+    approximate one; its candidate_count reports the pairs that were kept.
+
+    isf, a term -> weight mapping such as an isf_model.ISFModel built from a
+    corpus, is used instead of the inverse sentence frequency of the text.
+
+    solver, a solvers.PageRankSolver, selects how the scores are computed;
+    its report attribute holds the iterations, residual and time of the solve.
+
+    early_stopping stops PageRank as soon as the ranking of the sentences
+    that can make it into the summary (derived from ratio or words) provably
+    matches the one of the exact fixed point, and selects them with a partial
+    heap instead of a full sort. Their scores are then approximations, but the
+    selection is the one of the converged ranking (barring scores closer than
+    the convergence tolerance, which the converged ranking cannot order either).
+
+    by_components solves every connected component of the similarity graph
+    on its own, in parallel on component_executor ("process", "thread" or a
+    concurrent.futures.Executor) if one is given.
+
+    weight_storage ("float64", "float32" or "uint16") ranks the sentences on
+    compact weight arrays instead of a Graph, which takes 24, 16 or 12 bytes
+    per edge. float32 keeps about 7 significant digits of every similarity,
+    far below the convergence threshold of PageRank, so the summary is the
+    same. uint16 rounds every similarity to a multiple of 1/65535 of the
+    largest one and drops the weaker ones; scores move by about 1e-5 and
+    only sentences with nearly tied scores can swap. It cannot be combined
+    with by_components.
+
+    immutable_graph loads the similarities into a graph.CSRGraph, which keeps
+    the edges in flat arrays, instead of a Graph. The scores are the same.
+
+    cache, a cache.SummaryCache, stores the extracted sentences under a hash
+    of the text and the ranking parameters; split and scores are applied on
+    top of the cached entry. """
+    key = None
+    if cache is not None:
+        key = _summary_cache_key(text, ratio, words, language, additional_stopwords,
+                                 max_neighbors=max_neighbors, min_weight=min_weight, lsh=lsh, isf=isf,
+                                 solver=solver, early_stopping=early_stopping, by_components=by_components,
+                                 weight_storage=weight_storage)
+        ranking = cache.get(key)
+        if ranking is not None:
+            return _format_results(_ranking_to_sentences(ranking), split, scores)
+
+    document = _analyze(text, language, additional_stopwords)
+    isf_document = document.isf if isf is None else isf
+    extracted_sentences = _summarize_sentences(document.sentences, isf_document, ratio, words,
+                                               max_neighbors, min_weight, lsh, solver, early_stopping,
+                                               by_components, component_executor, weight_storage, immutable_graph)
+
+    if cache is not None:
+        cache.put(key, [(sentence.text, sentence.score, sentence.index) for sentence in extracted_sentences])
+
+    return _format_results(extracted_sentences, split, scores)
+
+
+def _summary_cache_key(text, ratio, words, language, additional_stopwords, **options):
+    if isinstance(text, AnalyzedDocument):
+        digest, language, additional_stopwords = text.digest, text.language, text.additional_stopwords
+    elif isinstance(text, str):
+        digest = _text_digest(text)
+    else:
         raise ValueError("Text parameter must be a Unicode object (str)!")
 
-    # Gets a list of processed sentences.
-    sentences = _clean_text_by_sentences(text, language, additional_stopwords)
+    # Options that are objects are identified by their parameters or contents.
+    for name in ("lsh", "solver"):
+        if options[name] is not None:
+            options[name] = repr(options[name])
+    if options["isf"] is not None:
+        options["isf"] = _mapping_fingerprint(options["isf"])
 
-    # Creates the graph and calculates the similarity coefficient for every pair of nodes.
-    graph = _build_graph([sentence.token for sentence in sentences])
-    
-    isf_document=inverse_sentence_frequency(text)
-    _set_graph_edge_weights(isf_document,graph)
+    return _cache_key(digest, ratio, words, language, additional_stopwords, options)
+
+
+def _summarize_sentences(sentences, isf_document, ratio, words, max_neighbors=None, min_weight=None, lsh=None,
+                         solver=None, early_stopping=False, by_components=False, component_executor=None,
+                         weight_storage=None, immutable_graph=False):
+    """ Returns the extracted sentences in their original order. """
+    if weight_storage is not None and by_components:
+        raise ValueError("weight_storage cannot be combined with by_components")
 
-    # Remove all nodes with all edges weights equal to zero.
-    _remove_unreachable_nodes(graph)
+    sentences = list(sentences)
+    tokens = [sentence.token for sentence in sentences]
 
-    # PageRank cannot be run in an empty graph.
-    if len(graph.nodes()) == 0:
-        return [] if split else ""
+    # Only the order of the sentences that can be extracted matters when stopping early.
+    top_k = _count_sentences_to_extract(sentences, ratio, words) if early_stopping else None
 
     # Ranks the tokens using the PageRank algorithm. Returns dict of sentence -> score
-    pagerank_scores = _textrank(graph)
+    if weight_storage is not None:
+        # The similarities go straight into compact arrays; no Graph is built.
+        nodes = list(dict.fromkeys(tokens))
+        pairs = _get_similarity_pairs(isf_document, nodes, max_neighbors, min_weight, lsh)
+        pagerank_scores = _textrank_from_pairs(nodes, pairs, weight_storage, solver=solver, top_k=top_k)
+    else:
+        graph = _build_similarity_graph(tokens, isf_document, max_neighbors, min_weight, lsh, immutable_graph)
+
+        # Remove all nodes with all edges weights equal to zero.
+        _remove_unreachable_nodes(graph)
+
+        # PageRank cannot be run in an empty graph.
+        if len(graph.nodes()) == 0:
+            pagerank_scores = {}
+        elif by_components:
+            pagerank_scores = _textrank_by_components(graph, solver=solver, top_k=top_k,
+                                                      executor=component_executor)
+        else:
+            pagerank_scores = _textrank(graph, solver=solver, top_k=top_k)
+
+    # Handles the case in which all similarities are zero: every sentence is
+    # ranked as part of a complete graph with equal weights, so all of them get
+    # the same score and the first ones are extracted.
+    if not pagerank_scores:
+        pagerank_scores = _complete_graph_scores(list(dict.fromkeys(tokens)))
+        if not pagerank_scores:
+            return []
 
-    # Adds the summa scores to the sentence objects.
-    _add_scores_to_sentences(sentences, pagerank_scores)
+    # Adds the summa scores to copies of the sentence objects.
+    sentences = _add_scores_to_sentences(sentences, pagerank_scores)
 
     # Extracts the most important sentences with the selected criterion.
-    extracted_sentences = _extract_most_important_sentences(sentences, ratio, words)
+    if early_stopping:
+        extracted_sentences = _extract_top_sentences(sentences, ratio, words, top_k)
+    else:
+        extracted_sentences = _extract_most_important_sentences(sentences, ratio, words)
 
     # Sorts the extracted sentences by apparition order in the original text.
     extracted_sentences.sort(key=lambda s: s.index)
 
+    return extracted_sentences
+
+
+def summarize_file(source, ratio=0.2, words=None, language="english", split=False, scores=False,
+                   additional_stopwords=None, encoding="utf-8", errors="strict", **kwargs):
+    """ Summarizes a file path or a binary buffer. The input is memory-mapped
+    and split into sentences incrementally, so only the sentences and their
+    tokens are held in memory. The remaining keyword arguments are passed to
+    summarize(). """
+    document = AnalyzedDocument.from_source(source, language, additional_stopwords, encoding, errors)
+    return summarize(document, ratio, words, language, split, scores, additional_stopwords, **kwargs)
+
+
+def summarize_hierarchical(text, ratio=0.2, words=None, language="english", split=False, scores=False,
+                           additional_stopwords=None, chunk_size=1000, level_ratios=(0.2,), executor=None,
+                           max_workers=None, isf=None, **kwargs):
+    """ Map-reduce summarization for very long documents.
+
+    The sentences are split into chunks of chunk_size sentences and each chunk
+    is summarized on its own keeping level_ratios[0] of it; the union of the
+    winners is reduced the same way with the following ratios, the last one
+    being repeated until at most chunk_size sentences remain. A final pass
+    with ratio or words selects the summary among them, which is returned in
+    the original order. Every pass ranks at most chunk_size sentences, so the
+    cost grows linearly with the length of the document instead of
+    quadratically.
+
+    executor runs the chunks of a level in parallel: "process", "thread" or a
+    concurrent.futures.Executor (left running); None runs them in sequence.
+    The ISF table of the whole document is shared by all the chunks. The
+    remaining keyword arguments are the ranking options of summarize(). """
+    if chunk_size < 2:
+        raise ValueError("chunk_size must be at least 2")
+    if not level_ratios or not all(0 < level_ratio < 1 for level_ratio in level_ratios):
+        raise ValueError("level_ratios must be a non empty sequence of ratios between 0 and 1")
+
+    document = _analyze(text, language, additional_stopwords)
+    isf_document = document.isf if isf is None else isf
+    sentences = list(document.sentences)
+
+    with _managed_executor(executor, max_workers) as pool:
+        level = 0
+        while len(sentences) > chunk_size:
+            # Every level keeps fewer sentences than it ranks, so the loop ends.
+            level_ratio = level_ratios[min(level, len(level_ratios) - 1)]
+            level += 1
+
+            chunks = [sentences[i:i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+            if pool is None:
+                winners = [_summarize_sentences(chunk, isf_document, level_ratio, None, **kwargs) for chunk in chunks]
+            else:
+                jobs = [pool.submit(_summarize_sentences, chunk, isf_document, level_ratio, None, **kwargs)
+                        for chunk in chunks]
+                winners = [job.result() for job in jobs]
+
+            # Chunks are consecutive and their winners are sorted, so the union keeps the original order.
+            sentences = [sentence for chunk_winners in winners for sentence in chunk_winners]
+
+    extracted_sentences = _summarize_sentences(sentences, isf_document, ratio, words, **kwargs)
     return _format_results(extracted_sentences, split, scores)
 
 
-def get_graph(text, language="english"):
-    sentences = _clean_text_by_sentences(text, language)
-    graph = _build_graph([sentence.token for sentence in sentences])
-    _set_graph_edge_weights(graph)
+class QuerySummarizer(object):
+    """
+    Query-focused summaries of one document.
+
+    The similarity graph and its normalized transition matrix are built once;
+    every query only runs a personalized PageRank whose random jumps land on the
+    sentences in proportion to the number of processed query words they
+    contain, warm-started from the scores of the previous query. Queries that
+    match no sentence get the plain TextRank summary.
+    """
+
+    def __init__(self, text, language="english", additional_stopwords=None, max_neighbors=None, min_weight=None,
+                 lsh=None, isf=None, solver=None, damping=0.85):
+        self.document = _analyze(text, language, additional_stopwords)
+        self.solver = solver if solver is not None else PageRankSolver()
+        self.damping = damping
+
+        graph = _build_graph(self.document.tokens)
+        isf_document = self.document.isf if isf is None else isf
+        _set_graph_edge_weights(isf_document, graph, max_neighbors, min_weight, lsh)
+        _remove_unreachable_nodes(graph)
+
+        self.nodes, self.matrix = _build_transition_matrix(graph)
+        if not self.nodes:
+            # All similarities are zero: the scores of the complete graph are computed in closed form.
+            self.nodes, self.matrix = list(_complete_graph_scores(list(dict.fromkeys(self.document.tokens)))), None
+        self._node_words = [set(node.split()) for node in self.nodes]
+        self._scores = [1.0 / len(self.nodes)] * len(self.nodes) if self.nodes else []
+
+    def summarize(self, query, ratio=0.2, words=None, split=False, scores=False):
+        if not self.nodes:
+            return [] if split or scores else ""
+
+        if self.matrix is None:
+            ranks = _complete_graph_scores(self.nodes, self.damping, self._teleport(query))
+        else:
+            self._scores = self.solver.solve(self.matrix, self._scores, self.damping, teleport=self._teleport(query))
+            ranks = dict(zip(self.nodes, self._scores))
+
+        sentences = _add_scores_to_sentences(self.document.sentences, ranks)
+        extracted_sentences = _extract_most_important_sentences(sentences, ratio, words)
+        extracted_sentences.sort(key=lambda s: s.index)
+
+        return _format_results(extracted_sentences, split, scores)
+
+    def _teleport(self, query):
+        query_sentences = _clean_text_by_sentences(query, self.document.language, self.document.additional_stopwords)
+        query_words = set(word for sentence in query_sentences for word in sentence.token.split())
+        overlaps = {node: len(words & query_words) for node, words in zip(self.nodes, self._node_words)}
+        return _personalization_vector(self.nodes, overlaps)
+
+
+def get_graph(text, language="english", lazy=False):
+    """ Returns the similarity graph of the text. If lazy is true, a read-only
+    similarity.SimilarityGraph that computes the edges as they are visited. """
+    document = _analyze(text, language)
+    if lazy:
+        return _SimilarityGraph(document)
+
+    graph = _build_graph(document.tokens)
+    _set_graph_edge_weights(document.isf, graph)
 
     return graph
 
 def get_words(text,language="english"):
-    words=_clean_text_by_words(text,language)
-    return words
+    # Word level, unlike the sentence tokens, so plain texts skip the analysis.
+    if isinstance(text, AnalyzedDocument):
+        return text.filtered_words
+    return _clean_text_by_words(text, language)
 
 def inverse_sentence_frequency(text,language="english"):
-    sentences = _clean_text_by_sentences(text, language)
-    sentence_count=len(sentences)
-    words=_clean_text_by_words(text,language)
-    words=[word for word in words]
-    words=list(set(words))
-    isf={}
-    stopwords=get_stopwords_by_language(language)
-    stopwords=[word for word in stopwords.split() if word]
-    words=list(set(words)-set(stopwords))
-    for word in words:
-        count=0
-        for sentence in sentences:
-            v=sentence.token
-            v=v.lower()
-            if word in v:
-                count=count+1
-        
-        if count==0:
-            count=1
-        res=log10(sentence_count/count)
-        isf[word]=res
-
-    return isf
-
-
-    
+    return _analyze(text, language).isf
@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from async_summarizer import AsyncSummarizer, summarize_async
+from summarizer import summarize
+
+TEXT = ("The quick brown fox jumps over the lazy dog. The dog sleeps in the sun all day. "
+        "A fox is a quick and clever animal. The sun warms the lazy dog and the fox. "
+        "Clever animals find food in the forest. The forest is quiet at night.")
+
+
+class SummarizeAsyncTest(unittest.TestCase):
+
+    def test_process_pool(self):
+        async def run():
+            with ProcessPoolExecutor(2) as executor:
+                return await summarize_async(TEXT, executor=executor, ratio=0.5)
+
+        self.assertEqual(asyncio.run(run()), summarize(TEXT, ratio=0.5))
+
+    def test_summarizer_process_pool(self):
+        async def run():
+            async with AsyncSummarizer(max_concurrency=2) as summarizer:
+                return await asyncio.gather(*(summarizer.summarize(TEXT, ratio=0.5) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(run()), [summarize(TEXT, ratio=0.5)] * 3)
+
+    def test_timeout_includes_waiting_for_a_slot(self):
+        async def run():
+            async with AsyncSummarizer(max_concurrency=1) as summarizer:
+                semaphore = summarizer._get_semaphore()
+                await semaphore.acquire()
+                with self.assertRaises(asyncio.TimeoutError):
+                    await summarizer.summarize(TEXT, timeout=0.1, ratio=0.5)
+                semaphore.release()
+                return await summarizer.summarize(TEXT, timeout=60, ratio=0.5)
+
+        self.assertEqual(asyncio.run(run()), summarize(TEXT, ratio=0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import random
+import unittest
+from unittest import mock
+import summarizer
+from solvers import PageRankSolver
+from document import AnalyzedDocument
+from summarizer import get_words, summarize, summarize_hierarchical
+from textcleaner import clean_text_by_word
+
+
+def _random_text(sentence_count, seed=1):
+    generator = random.Random(seed)
+    vocabulary = ["".join(generator.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)) for _ in range(300)]
+    sentences = (" ".join(generator.choice(vocabulary) for _ in range(8)).capitalize() + "."
+                 for _ in range(sentence_count))
+    return " ".join(sentences)
+
+
+class SummarizeTest(unittest.TestCase):
+
+    def test_early_stopping_selects_the_converged_summary(self):
+        for method in ("power", "gauss-seidel"):
+            for seed in range(15):
+                text = _random_text(300, seed)
+                self.assertEqual(summarize(text, ratio=0.03, early_stopping=True, solver=PageRankSolver(method)),
+                                 summarize(text, ratio=0.03, solver=PageRankSolver(method)), (method, seed))
+
+    def test_early_stopping_without_sentences(self):
+        for text in ("", "the a an. of the."):
+            self.assertEqual(summarize(text, words=5, early_stopping=True), summarize(text, words=5))
+            self.assertEqual(summarize(text, early_stopping=True), "")
+
+
+class SummarizeHierarchicalTest(unittest.TestCase):
+
+    def test_every_pass_is_bounded_by_chunk_size(self):
+        text = _random_text(1200)
+        sizes = []
+        original = summarizer._summarize_sentences
+
+        def recording(sentences, *args, **kwargs):
+            sizes.append(len(sentences))
+            return original(sentences, *args, **kwargs)
+
+        with mock.patch.object(summarizer, "_summarize_sentences", recording):
+            result = summarize_hierarchical(text, chunk_size=50, split=True)
+
+        self.assertTrue(result)
+        self.assertLessEqual(max(sizes), 50)
+
+    def test_invalid_level_ratios(self):
+        with self.assertRaises(ValueError):
+            summarize_hierarchical(_random_text(10), level_ratios=(1,))
+
+
+class GetWordsTest(unittest.TestCase):
+
+    def test_word_level_output(self):
+        text = "The dogs were running in the park. A dog is a loyal animal."
+        words = clean_text_by_word(text)
+        self.assertIn("", words)
+        self.assertEqual(get_words(text), words)
+        self.assertEqual(get_words(AnalyzedDocument(text)), words)
+
+
+if __name__ == "__main__":
+    unittest.main()
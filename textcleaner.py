@@ -1,5 +1,9 @@
+import codecs
+import mmap
+import os
 import string
 import unicodedata
+from functools import lru_cache
 
 import re
 from snowball import SnowballStemmer
@@ -12,27 +16,72 @@ AB_ACRONYM = re.compile(r"(\.[a-zA-Z]\.)\s(\w)")
 AB_ACRONYM_LETTERS = re.compile(r"([a-zA-Z])\.([a-zA-Z])\.")
 UNDO_AB_SENIOR = re.compile(r"([A-Z][a-z]{1,2}\.)" + SEPARATOR + r"(\w)")
 UNDO_AB_ACRONYM = re.compile(r"(\.[a-zA-Z]\.)" + SEPARATOR + r"(\w)")
+# Text before a newline that replace_abbreviations could join with the next line.
+AB_BEFORE_NEWLINE = re.compile(r"(?:[A-Z][a-z]{1,2}|\.[a-zA-Z])\.\Z")
+READ_SIZE = 1 << 20
 
+# Legacy state of init_textcleanner; the cleaning functions use TextCleaner instances.
 STEMMER = None
 STOPWORDS = None
 
 
+class TextCleaner(object):
+    """
+    Word filters of one language and stopword set: owns its stemmer, its
+    stopwords and the filter chain applied to every sentence or word.
+
+    Instances are not modified after they are built, so one can be shared by
+    any number of threads. get_text_cleaner returns a cached instance.
+    """
+
+    def __init__(self, language="english", additional_stopwords=None):
+        if not language in SnowballStemmer.languages:
+            raise ValueError("Valid languages are: " + ", ".join(sorted(SnowballStemmer.languages)))
+        words = get_stopwords_by_language(language)
+        if not additional_stopwords:
+            additional_stopwords = {}
+
+        self.language = language
+        self.stemmer = SnowballStemmer(language)
+        self.stopwords = frozenset({ w for w in words.split() if w } | { w for w in additional_stopwords if w })
+        self.filters = [lambda x: x.lower(), strip_numeric, strip_punctuation, self.remove_stopwords,
+                        self.stem_sentence]
+
+    def remove_stopwords(self, sentence):
+        return " ".join(w for w in sentence.split() if w not in self.stopwords)
+
+    def stem_sentence(self, sentence):
+        return " ".join(self.stemmer.stem(word) for word in sentence.split())
+
+    def filter_words(self, sentences):
+        return [apply_filters(sentence, self.filters) for sentence in sentences]
+
+
+def get_text_cleaner(language="english", additional_stopwords=None):
+    """ Returns the shared TextCleaner of a language and set of additional
+    stopwords, building it the first time. """
+    return _get_text_cleaner(language, frozenset(additional_stopwords or ()))
+
+
+@lru_cache(maxsize=64)
+def _get_text_cleaner(language, additional_stopwords):
+    return TextCleaner(language, additional_stopwords)
+
+
 def set_stemmer_language(language):
     global STEMMER
-    if not language in SnowballStemmer.languages:
-        raise ValueError("Valid languages are: " + ", ".join(sorted(SnowballStemmer.languages)))
-    STEMMER = SnowballStemmer(language)
+    STEMMER = get_text_cleaner(language).stemmer
 
 
 def set_stopwords_by_language(language, additional_stopwords):
     global STOPWORDS
-    words = get_stopwords_by_language(language)
-    if not additional_stopwords:
-        additional_stopwords = {}
-    STOPWORDS = frozenset({ w for w in words.split() if w } | { w for w in additional_stopwords if w })
+    STOPWORDS = get_text_cleaner(language, additional_stopwords).stopwords
 
 
 def init_textcleanner(language, additional_stopwords):
+    """ Sets the module globals used by remove_stopwords, stem_sentence and
+    filter_words. Kept for compatibility; these globals are shared by all
+    threads, so pass a TextCleaner to the cleaning functions instead. """
     set_stemmer_language(language)
     set_stopwords_by_language(language, additional_stopwords)
 
@@ -42,6 +91,77 @@ def split_sentences(text):
     return [undo_replacement(sentence) for sentence in get_sentences(processed)]
 
 
+def iter_text_chunks(source, encoding="utf-8", errors="strict", chunk_size=READ_SIZE):
+    """ Yields the text of a file path or a binary buffer decoded in chunks.
+    Files are memory-mapped, so they are never read as a whole. """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                yield from _decode_chunks(mapping, encoding, errors, chunk_size)
+    else:
+        with memoryview(source) as buffer:
+            yield from _decode_chunks(buffer.cast("B"), encoding, errors, chunk_size)
+
+
+def _decode_chunks(buffer, encoding, errors, chunk_size):
+    decoder = codecs.getincrementaldecoder(encoding)(errors)
+    for start in range(0, len(buffer), chunk_size):
+        chunk = decoder.decode(buffer[start:start + chunk_size])
+        if chunk:
+            yield chunk
+    chunk = decoder.decode(b"", final=True)
+    if chunk:
+        yield chunk
+
+
+def _find_line_boundary(text):
+    # Sentences never span lines, except when an abbreviation right before a
+    # newline is joined to the next line. Returns the end of the last line that
+    # can be split safely, or 0.
+    end = len(text)
+    while True:
+        position = text.rfind("\n", 0, end)
+        if position < 0:
+            return 0
+        if not AB_BEFORE_NEWLINE.search(text, max(0, position - 4), position):
+            return position + 1
+        end = position
+
+
+def _find_sentence_boundary(text):
+    # End of the last sentence closed by a terminator that is followed by
+    # whitespace and one more character, or 0. Abbreviations keep the length
+    # of the text, and neither them nor the next sentence can reach back past
+    # such a boundary, so split_sentences finds the same sentences on both sides.
+    boundary = 0
+    for match in RE_SENTENCE.finditer(replace_abbreviations(text)):
+        if match.group(1) is not None and match.end() + 1 < len(text):
+            boundary = match.end()
+    return boundary
+
+
+def iter_sentences(source, encoding="utf-8", errors="strict", chunk_size=READ_SIZE):
+    """ Yields the sentences of a file path or a binary buffer one at a time,
+    with the same boundaries split_sentences finds in the whole text, while
+    holding only a chunk of the decoded text in memory.
+
+    The text is cut at newlines and after sentence terminators; a run of text
+    with neither is held whole until it ends. """
+    pending = ""
+    for chunk in iter_text_chunks(source, encoding, errors, chunk_size):
+        pending += chunk
+        boundary = _find_line_boundary(pending)
+        boundary += _find_sentence_boundary(pending[boundary:])
+        if boundary:
+            yield from split_sentences(pending[:boundary])
+            pending = pending[boundary:]
+
+    if pending:
+        yield from split_sentences(pending)
+
+
 def replace_abbreviations(text):
     return replace_with_separator(text, SEPARATOR, [AB_SENIOR, AB_ACRONYM])
 
@@ -139,26 +259,51 @@ def merge_syntactic_units(original_units, filtered_units, tags=None):
     return units
 
 
-def clean_text_by_sentences(text, language="english", additional_stopwords=None):
+def clean_text_by_sentences(text, language="english", additional_stopwords=None, cleaner=None):
     """ Tokenizes a given text into sentences, applying filters and lemmatizing them.
+    cleaner, a TextCleaner, replaces language and additional_stopwords.
     Returns a SyntacticUnit list. """
-    init_textcleanner(language, additional_stopwords)
+    if cleaner is None:
+        cleaner = get_text_cleaner(language, additional_stopwords)
     original_sentences = split_sentences(text)
-    filtered_sentences = filter_words(original_sentences)
+    filtered_sentences = cleaner.filter_words(original_sentences)
 
     return merge_syntactic_units(original_sentences, filtered_sentences)
 
-def clean_text_by_word(text, language="english", deacc=False, additional_stopwords=None):
+def clean_sentences_from_source(source, language="english", additional_stopwords=None, encoding="utf-8",
+                                errors="strict", cleaner=None):
+    """ Like clean_text_by_sentences, but reads a file path or a binary buffer
+    incrementally. Only the original and processed text of each sentence is
+    kept, never full copies of the input. Returns a SyntacticUnit list. """
+    if cleaner is None:
+        cleaner = get_text_cleaner(language, additional_stopwords)
+    units = []
+    for index, sentence in enumerate(iter_sentences(source, encoding, errors)):
+        token = apply_filters(sentence, cleaner.filters)
+        if token == '':
+            continue
+        unit = SyntacticUnit(sentence, token)
+        unit.index = index
+        units.append(unit)
+
+    return units
+
+def clean_text_by_word(text, language="english", deacc=False, additional_stopwords=None, cleaner=None):
     """ Tokenizes a given text into words, applying filters and lemmatizing them.
-    Returns a dict of word -> syntacticUnit. """
-    init_textcleanner(language, additional_stopwords)
-    text_without_acronyms = replace_with_separator(text, "", [AB_ACRONYM_LETTERS])
-    original_words = list(tokenize(text_without_acronyms, lowercase=True, deacc=deacc))
-    filtered_words = filter_words(original_words)
-    tags = None
-    units = merge_syntactic_units(original_words, filtered_words, tags)
-    # return { unit.text : unit for unit in units }
-    return filtered_words
+    Returns the list of filtered words ('' for the removed ones). """
+    return clean_words(text, language, deacc, additional_stopwords, cleaner)[1]
+
+
+def clean_words(text, language="english", deacc=False, additional_stopwords=None, cleaner=None):
+    """ Tokenizes a given text into words and returns two aligned lists: the
+    original words and their filtered, lemmatized forms ('' for the removed
+    ones). Every distinct word is filtered only once. """
+    if cleaner is None:
+        cleaner = get_text_cleaner(language, additional_stopwords)
+    original_words = list(tokenize_by_word(text, deacc))
+    distinct_words = list(set(original_words))
+    filtered = dict(zip(distinct_words, cleaner.filter_words(distinct_words)))
+    return original_words, [filtered[word] for word in original_words]
 
 
 def tokenize_by_word(text, deacc=False):
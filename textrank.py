@@ -1,6 +1,7 @@
 import sys, getopt, os
 
 from summarizer import summarize
+from keywords import keywords
 
 
 # Types of summarization
@@ -8,6 +9,8 @@ SENTENCE = 1
 WORD = 0
 
 def textrank(text,ratio,summarize_by=SENTENCE,words=None, additional_stopwords=None):
+    if summarize_by == WORD:
+        return keywords(text, ratio, words, additional_stopwords=additional_stopwords)
     return summarize(text, ratio, words, additional_stopwords=additional_stopwords)
     
 
@@ -1,17 +1,30 @@
+import os
 import networkx as nx
 import math
 from matplotlib import pylab as plt
 from summarizer import get_graph
-with open("training.txt") as file:
-    text = file.read()
-graph=get_graph(text)
-edge_list=[]
+from cache import text_digest
+from graph_file import MAGIC, load_graph, save_graph
+TEXT_PATH = "training.txt"
+# Bump when get_graph computes different similarities, to drop the old graphs.
+GRAPH_VERSION = 1
+# The similarity graph is computed once per text and kept in the user's own
+# cache directory, out of the working tree and of the shared temporary one. It
+# is named after the text and the file format, so a stale file is never reused.
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "texsa")
+with open(TEXT_PATH) as file:
+	text = file.read()
+GRAPH_PATH = os.path.join(CACHE_DIR, "%s-%s-v%d.graph" % (text_digest(text), MAGIC.decode("ascii"), GRAPH_VERSION))
+if not os.path.exists(GRAPH_PATH):
+	os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+	save_graph(get_graph(text), GRAPH_PATH + ".tmp")
+	os.replace(GRAPH_PATH + ".tmp", GRAPH_PATH)
+graph=load_graph(GRAPH_PATH)
 G=nx.DiGraph()
-for edge in graph.edge_properties:
-	G.add_edges_from([edge],weight=round(graph.edge_properties[edge]['weight'],2))
+G.add_weighted_edges_from((u, v, round(graph.edge_weight((u, v)), 2)) for u, v in graph.edges())
 edge_labels=dict([((u,v,),d['weight']) for u,v,d in G.edges(data=True)])
 pos=nx.random_layout(G)
 nx.draw_networkx_edge_labels(G,pos,edge_labels=edge_labels)
 nx.draw(G,pos,node_size=150,edge_cmap=plt.cm.Reds,with_labels=False)
 #nx.draw(graph, ) 
-plt.show()
\ No newline at end of file
+plt.show()